@@ -1,54 +1,171 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from utils.parser import DocumentParser
-from utils.validator import BudgetValidator
-from utils.ai_grader import AIGrader
+from utils.validator import BudgetValidator, display_value, rounded_report
 import json
+import html
 from io import BytesIO
 
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library serializer
+    orjson = None
+
 # ==================== PASSWORD PROTECTION ====================
-# def check_password():
-#     """Returns `True` if the user had the correct password."""
-
-#     def password_entered():
-#         """Checks whether a password entered by the user is correct."""
-#         if st.session_state["password"] == st.secrets["password"]:
-#             st.session_state["password_correct"] = True
-#             del st.session_state["password"]  # Don't store password
-#         else:
-#             st.session_state["password_correct"] = False
-
-#     if "password_correct" not in st.session_state:
-#         # First run, show input for password
-#         st.text_input(
-#             "Password", 
-#             type="password", 
-#             on_change=password_entered, 
-#             key="password"
-#         )
-#         st.markdown("### 🔒 Budget Grader - Login Required")
-#         st.info("Please enter the password to access the application.")
-#         return False
-#     elif not st.session_state["password_correct"]:
-#         # Password incorrect, show input + error
-#         st.text_input(
-#             "Password", 
-#             type="password", 
-#             on_change=password_entered, 
-#             key="password"
-#         )
-#         st.error("😕 Password incorrect")
-#         return False
-#     else:
-#         # Password correct
-#         return True
-
-# # Check password before showing app
+# Uncomment to require the password from st.secrets (see auth.py)
+# from auth import check_password
 # if not check_password():
 #     st.stop()  # Don't continue if password is wrong
 
 # ==================== MAIN APP (only shows if password correct) ====================
 
+CORRECT_STYLE = 'background-color: #90EE90'  # Light green
+INCORRECT_STYLE = 'background-color: #FFB6C6'  # Light red
+HTML_TABLE_MAX_ROWS = 50  # Larger tables go through the (cached) pandas Styler
+
+
+def build_cell_styles(df, correct_mask):
+    """Turn a True/False/NaN correctness mask into a frame of cell CSS"""
+    mask = correct_mask.reindex(index=df.index, columns=df.columns)
+    if 'description' in mask.columns:
+        mask['description'] = None  # Don't highlight description column
+    values = mask.to_numpy(dtype=object)
+    styles = np.where(values == True, CORRECT_STYLE, np.where(values == False, INCORRECT_STYLE, ''))
+    return pd.DataFrame(styles, index=df.index, columns=df.columns)
+
+
+def item_correct_mask(df, item_results):
+    """Pivot per-item validation results into a mask aligned with an expense table"""
+    # Last result wins for repeated descriptions
+    latest = {item['description']: item['validations'] for item in item_results}
+    rows = [
+        (desc, col, result.get('correct', False))
+        for desc, validations in latest.items()
+        for col, result in validations.items()
+    ]
+    if not rows or 'description' not in df.columns:
+        return pd.DataFrame(index=df.index, columns=df.columns)
+
+    long_df = pd.DataFrame(rows, columns=['description', 'col', 'correct'])
+    mask = long_df.pivot(index='description', columns='col', values='correct')
+    return mask.reindex(index=df['description']).set_axis(df.index)
+
+
+def cell_text(value):
+    """Display text for one table cell (numbers to cents, same for every table size)"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    if isinstance(value, float):
+        return format(value, '.2f')
+    return str(value)
+
+
+def format_cell(value):
+    """Escaped display text for one hand-built HTML table cell"""
+    return html.escape(cell_text(value))
+
+
+@st.cache_data(show_spinner=False)
+def styled_table_html(df, styles):
+    """Run the pandas Styler once per distinct table and highlighting"""
+    return (
+        df.style.format(cell_text, escape='html')
+        .apply(lambda _: styles, axis=None)
+        .hide(axis='index')
+        .to_html()
+    )
+
+
+def render_table(df, styles):
+    """Show a highlighted table: hand-built HTML when small, cached Styler HTML otherwise"""
+    if len(df) > HTML_TABLE_MAX_ROWS:
+        st.markdown(
+            f'<div style="max-height: 600px; overflow: auto">{styled_table_html(df, styles)}</div>',
+            unsafe_allow_html=True
+        )
+        return
+
+    header = ''.join(f'<th>{html.escape(str(col))}</th>' for col in df.columns)
+    rows = ''.join(
+        '<tr>' + ''.join(
+            f'<td style="{style}">{format_cell(value)}</td>'
+            for value, style in zip(values, row_styles)
+        ) + '</tr>'
+        for values, row_styles in zip(df.itertuples(index=False), styles.itertuples(index=False))
+    )
+    st.markdown(
+        f'<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>',
+        unsafe_allow_html=True
+    )
+
+
+def results_markdown(validations):
+    """One markdown table of field / expected / actual for a set of validations"""
+    if not validations:
+        # e.g. a row with every value missing: no header-only table
+        return "_No calculations to check._"
+    lines = ["| Field | Expected | Actual |", "|---|---|---|"]
+    for field, result in validations.items():
+        icon = "✅" if result['correct'] else "❌"
+        lines.append(
+            f"| {icon} **{field.replace('_', ' ').title()}** | {display_value(result['expected'])} | {display_value(result['actual'])} |"
+        )
+    return "\n".join(lines)
+
+def build_expense_tables(data):
+    """Build the fixed/variable/total DataFrames once per parsed document"""
+    return {
+        'fixed': pd.DataFrame(data.get('fixed_expenses', [])),
+        'variable': pd.DataFrame(data.get('variable_expenses', [])),
+        'total': pd.DataFrame([data.get('total_expenses', {})])
+    }
+
+
+@st.cache_data(show_spinner=False)
+def parse_document(file_bytes: bytes, file_name: str):
+    """Parse an uploaded file once per distinct file content"""
+    return DocumentParser().parse(file_bytes, file_name)
+
+
+@st.cache_resource
+def get_validator(inflation_rate, tolerance):
+    """One BudgetValidator per grading settings, shared across reruns"""
+    return BudgetValidator(
+        inflation_rate=inflation_rate,
+        tolerance=tolerance
+    )
+
+
+@st.cache_data(show_spinner=False)
+def validate_budget(extracted_data, inflation_rate, tolerance):
+    """Rule-based grading, reused while the data and settings are unchanged"""
+    return get_validator(inflation_rate, tolerance).validate(extracted_data)
+
+
+@st.cache_resource
+def get_pdf_report_generator():
+    """Import reportlab (and its font setup) once per server process"""
+    from utils.report_generator import generate_pdf_report
+    return generate_pdf_report
+
+
+@st.cache_data(show_spinner=False)
+def pdf_report_bytes(report):
+    """Render the PDF report once per distinct grading report"""
+    generate_pdf_report = get_pdf_report_generator()
+    return generate_pdf_report(report).getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def report_json(report):
+    """Serialize the grading report once per distinct grading report"""
+    report = rounded_report(report)
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(report, indent=2)
+
+
 # Page config
 st.set_page_config(
     page_title="Budget Grader",
@@ -74,6 +191,10 @@ if 'extracted_data' not in st.session_state:
     st.session_state.extracted_data = None
 if 'grading_report' not in st.session_state:
     st.session_state.grading_report = None
+if 'file_bytes' not in st.session_state:
+    st.session_state.file_bytes = None
+if 'expense_tables' not in st.session_state:
+    st.session_state.expense_tables = None
 
 # Header
 st.title("📊 Budget Grader")
@@ -109,10 +230,11 @@ with tab1:
         if st.button("🔍 Extract & Grade", type="primary", use_container_width=True):
             with st.spinner("Processing..."):
                 try:
-                    # Extract
-                    parser = DocumentParser()
-                    extracted_data = parser.parse(uploaded_file)
+                    # Extract (read the upload once; every parse gets a fresh buffer)
+                    st.session_state.file_bytes = uploaded_file.getvalue()
+                    extracted_data = parse_document(st.session_state.file_bytes, uploaded_file.name)
                     st.session_state.extracted_data = extracted_data
+                    st.session_state.expense_tables = build_expense_tables(extracted_data)
 
                     # Validate that we have data
                     if not extracted_data.get('fixed_expenses') and not extracted_data.get('variable_expenses'):
@@ -121,6 +243,8 @@ with tab1:
 
                     # Grade immediately
                     if use_ai and api_key:
+                        # Only pull in the OpenAI client when AI grading is enabled
+                        from utils.ai_grader import AIGrader
                         grader = AIGrader(
                             provider="openai",
                             api_key=api_key,
@@ -132,11 +256,7 @@ with tab1:
                             tolerance=tolerance
                         )
                     else:
-                        validator = BudgetValidator(
-                            inflation_rate=inflation_rate,
-                            tolerance=tolerance
-                        )
-                        report = validator.validate(extracted_data)
+                        report = validate_budget(extracted_data, inflation_rate, tolerance)
 
                     st.session_state.grading_report = report
                     st.success("✅ Grading complete!")
@@ -154,76 +274,29 @@ with tab1:
 
         data = st.session_state.extracted_data
         report = st.session_state.grading_report
+        if st.session_state.expense_tables is None:
+            st.session_state.expense_tables = build_expense_tables(data)
+        tables = st.session_state.expense_tables
 
         # Fixed Expenses with validation
         st.markdown("#### 📋 Fixed Expenses")
         if data.get('fixed_expenses'):
-            fixed_df = pd.DataFrame(data['fixed_expenses'])
-
-            # Create validation lookup
-            validation_map = {}
-            for item_result in report.get('fixed_expenses_results', []):
-                desc = item_result['description']
-                validation_map[desc] = item_result['validations']
-
-            # Apply styling
-            def highlight_fixed(row):
-                desc = row.get('description', '')
-                if desc not in validation_map:
-                    return [''] * len(row)
-
-                validations = validation_map[desc]
-                styles = []
-                for col in fixed_df.columns:
-                    col_key = col
-                    if col == 'description':
-                        styles.append('')  # Don't highlight description column
-                    elif col_key in validations:
-                        if validations[col_key].get('correct', False):
-                            styles.append('background-color: #90EE90')  # Light green
-                        else:
-                            styles.append('background-color: #FFB6C6')  # Light red
-                    else:
-                        styles.append('')
-                return styles
+            fixed_df = tables['fixed']
 
-            styled_fixed = fixed_df.style.apply(highlight_fixed, axis=1)
-            st.dataframe(styled_fixed, use_container_width=True, hide_index=True)
+            # Apply styling in one pass over the whole table
+            fixed_mask = item_correct_mask(fixed_df, report.get('fixed_expenses_results', []))
+            fixed_styles = build_cell_styles(fixed_df, fixed_mask)
+            render_table(fixed_df, fixed_styles)
 
         # Variable Expenses with validation
         st.markdown("#### 📋 Variable Expenses")
         if data.get('variable_expenses'):
-            var_df = pd.DataFrame(data['variable_expenses'])
-
-            # Create validation lookup
-            validation_map = {}
-            for item_result in report.get('variable_expenses_results', []):
-                desc = item_result['description']
-                validation_map[desc] = item_result['validations']
-
-            # Apply styling
-            def highlight_variable(row):
-                desc = row.get('description', '')
-                if desc not in validation_map:
-                    return [''] * len(row)
-
-                validations = validation_map[desc]
-                styles = []
-                for col in var_df.columns:
-                    col_key = col
-                    if col == 'description':
-                        styles.append('')  # Don't highlight description column
-                    elif col_key in validations:
-                        if validations[col_key].get('correct', False):
-                            styles.append('background-color: #90EE90')  # Light green
-                        else:
-                            styles.append('background-color: #FFB6C6')  # Light red
-                    else:
-                        styles.append('')
-                return styles
+            var_df = tables['variable']
 
-            styled_var = var_df.style.apply(highlight_variable, axis=1)
-            st.dataframe(styled_var, use_container_width=True, hide_index=True)
+            # Apply styling in one pass over the whole table
+            var_mask = item_correct_mask(var_df, report.get('variable_expenses_results', []))
+            var_styles = build_cell_styles(var_df, var_mask)
+            render_table(var_df, var_styles)
 
         # Total Expenses with validation
         st.markdown("#### 📋 Total Expenses")
@@ -248,31 +321,20 @@ with tab1:
                 for col, result in total_results.items():
                     st.write(f"**{col}:**")
                     st.write(f"  - Correct: {result.get('correct')}")
-                    st.write(f"  - Expected: {result.get('expected')}")
-                    st.write(f"  - Actual: {result.get('actual')}")
+                    st.write(f"  - Expected: {display_value(result.get('expected'))}")
+                    st.write(f"  - Actual: {display_value(result.get('actual'))}")
                     st.write(f"  - Status: {result.get('status')}")
                     if 'breakdown' in result:
                         st.write(f"  - Breakdown: {result.get('breakdown')}")
                     st.write("")
 
-            # Create dataframe for total expenses
-            total_df = pd.DataFrame([total_data])
-
-            # Apply styling
-            def highlight_total(row):
-                styles = []
-                for col in total_df.columns:
-                    if col in total_results:
-                        if total_results[col].get('correct', False):
-                            styles.append('background-color: #90EE90')  # Light green
-                        else:
-                            styles.append('background-color: #FFB6C6')  # Light red
-                    else:
-                        styles.append('')
-                return styles
+            # Total expenses dataframe (built once after parsing)
+            total_df = tables['total']
 
-            styled_total = total_df.style.apply(highlight_total, axis=1)
-            st.dataframe(styled_total, use_container_width=True, hide_index=True)
+            # Apply styling in one pass over the whole table
+            total_mask = pd.DataFrame([{col: result.get('correct', False) for col, result in total_results.items()}])
+            total_styles = build_cell_styles(total_df, total_mask)
+            render_table(total_df, total_styles)
 
 # TAB 2: Results (Vertical Layout)
 with tab2:
@@ -299,44 +361,21 @@ with tab2:
         st.subheader("Fixed Expenses Results")
         for item in report.get('fixed_expenses_results', []):
             st.markdown(f"### {item['description']}")
-            for field, result in item['validations'].items():
-                icon = "✅" if result['correct'] else "❌"
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    st.write(f"{icon} **{field.replace('_', ' ').title()}**")
-                with col2:
-                    st.write(f"Expected: {result['expected']}")
-                with col3:
-                    st.write(f"Actual: {result['actual']}")
+            st.markdown(results_markdown(item['validations']))
             st.divider()
         
         # VARIABLE EXPENSES - Vertical
         st.subheader("Variable Expenses Results")
         for item in report.get('variable_expenses_results', []):
             st.markdown(f"### {item['description']}")
-            for field, result in item['validations'].items():
-                icon = "✅" if result['correct'] else "❌"
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    st.write(f"{icon} **{field.replace('_', ' ').title()}**")
-                with col2:
-                    st.write(f"Expected: {result['expected']}")
-                with col3:
-                    st.write(f"Actual: {result['actual']}")
+            st.markdown(results_markdown(item['validations']))
             st.divider()
         
         # TOTAL EXPENSES - Vertical
         st.subheader("Total Expenses Results")
         total_results = report.get('total_expenses_results', {})
-        for field, result in total_results.items():
-            icon = "✅" if result['correct'] else "❌"
-            col1, col2, col3 = st.columns([2, 1, 1])
-            with col1:
-                st.write(f"{icon} **{field.replace('_', ' ').title()}**")
-            with col2:
-                st.write(f"Expected: {result['expected']}")
-            with col3:
-                st.write(f"Actual: {result['actual']}")
+        if total_results:
+            st.markdown(results_markdown(total_results))
         
         st.divider()
         
@@ -344,21 +383,18 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            from utils.report_generator import generate_pdf_report
-            pdf_buffer = generate_pdf_report(report)
             st.download_button(
                 "📥 Download PDF Report",
-                data=pdf_buffer,
+                data=pdf_report_bytes(report),
                 file_name=f"grading_report.pdf",
                 mime="application/pdf",
                 use_container_width=True
             )
         
         with col2:
-            json_str = json.dumps(report, indent=2)
             st.download_button(
                 "📥 Download JSON Data",
-                data=json_str,
+                data=report_json(report),
                 file_name=f"grading_data.json",
                 mime="application/json",
                 use_container_width=True
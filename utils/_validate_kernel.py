@@ -0,0 +1,135 @@
+"""
+Compiled numeric kernels for BudgetValidator
+Numba is optional: without it the same functions run as plain NumPy
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Each check function takes the item columns (float64, NaN for missing) and returns
+# (expected, difference, present, correct), each shaped (checks, items) with one row
+# per formula in the order of FIXED_CHECKS / VARIABLE_CHECKS. A formula is only
+# checked (present) when the student filled in its inputs and result.
+FIXED_CHECKS = [
+    'monthly_consumption', '2024_year_consumption',
+    'inflation_amount', 'estimated_2025_consumption'
+]
+VARIABLE_CHECKS = [
+    'estimated_2025_yearly_pt_days', 'consumption_per_patient_day',
+    'amount_per_yearly_pt_days', 'inflation_amount', 'total_amount'
+]
+
+
+def _finish_checks(actual: np.ndarray, expected: np.ndarray, inputs_present: np.ndarray, tolerance: float) -> tuple:
+    """Compare stacked actual/expected rows"""
+    difference = np.abs(actual - expected)
+    present = inputs_present & ~np.isnan(actual)
+    # NaN/inf differences (missing values, x/0) compare as incorrect
+    correct = difference <= tolerance
+    return expected, difference, present, correct
+
+
+def _fixed_checks_numpy(five_month, monthly, year_2024, multiplier, inflation_amount, estimated_2025, tolerance):
+    """All fixed expense formulas with one NumPy expression each"""
+    actual = np.stack([monthly, year_2024, inflation_amount, estimated_2025])
+    expected = np.stack([
+        five_month / 5,                 # Monthly Consumption = 5-month / 5
+        monthly * 12,                   # 2024 Year = Monthly × 12
+        year_2024 * multiplier,         # Inflation Amount = 2024 Year × (rate / 100)
+        year_2024 + inflation_amount,   # 2025 Estimate = 2024 Year + Inflation
+    ])
+    inputs_present = np.stack([
+        ~np.isnan(five_month),
+        ~np.isnan(monthly),
+        ~np.isnan(year_2024),
+        ~np.isnan(year_2024) & ~np.isnan(inflation_amount),
+    ])
+    return _finish_checks(actual, expected, inputs_present, tolerance)
+
+
+def _variable_checks_numpy(five_month, five_month_days, per_day, yearly_days, amount_yearly,
+                           multiplier, inflation_amount, total, tolerance):
+    """All variable expense formulas with one NumPy expression each"""
+    actual = np.stack([yearly_days, per_day, amount_yearly, inflation_amount, total])
+    # A zero patient-day count yields inf/nan, which is reported as incorrect
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.stack([
+            (five_month_days / 5) * 12,         # Estimated 2025 yearly pt days = (5-month pt days ÷ 5) × 12
+            five_month / five_month_days,       # Consumption per Patient Day = 5-month / 5-month days
+            per_day * yearly_days,              # Amount per Yearly Days = Per day × Yearly days
+            amount_yearly * multiplier,         # Inflation Amount = Amount yearly × (rate / 100)
+            amount_yearly + inflation_amount,   # Total = Amount yearly + Inflation
+        ])
+    inputs_present = np.stack([
+        ~np.isnan(five_month_days),
+        ~np.isnan(five_month) & ~np.isnan(five_month_days),
+        ~np.isnan(per_day) & ~np.isnan(yearly_days),
+        ~np.isnan(amount_yearly),
+        ~np.isnan(amount_yearly) & ~np.isnan(inflation_amount),
+    ])
+    return _finish_checks(actual, expected, inputs_present, tolerance)
+
+
+if njit is not None:
+    # One fused loop per table instead of ~25 small ufunc calls. No fastmath: the
+    # expected values are reported, so they must round exactly like the NumPy path.
+    # error_model='numpy' makes x/0 give inf/nan instead of raising.
+
+    @njit(cache=True, error_model='numpy')
+    def _store_check(row, i, actual, expected_value, inputs_present, tolerance,
+                     expected, difference, present, correct):
+        expected[row, i] = expected_value
+        difference[row, i] = abs(actual - expected_value)
+        present[row, i] = inputs_present and not np.isnan(actual)
+        correct[row, i] = difference[row, i] <= tolerance
+
+    @njit(cache=True, error_model='numpy')
+    def fixed_checks(five_month, monthly, year_2024, multiplier, inflation_amount, estimated_2025, tolerance):
+        """All fixed expense formulas in one pass over the items"""
+        n = five_month.shape[0]
+        expected = np.empty((4, n))
+        difference = np.empty((4, n))
+        present = np.empty((4, n), np.bool_)
+        correct = np.empty((4, n), np.bool_)
+        for i in range(n):
+            _store_check(0, i, monthly[i], five_month[i] / 5, not np.isnan(five_month[i]),
+                         tolerance, expected, difference, present, correct)
+            _store_check(1, i, year_2024[i], monthly[i] * 12, not np.isnan(monthly[i]),
+                         tolerance, expected, difference, present, correct)
+            _store_check(2, i, inflation_amount[i], year_2024[i] * multiplier[i], not np.isnan(year_2024[i]),
+                         tolerance, expected, difference, present, correct)
+            _store_check(3, i, estimated_2025[i], year_2024[i] + inflation_amount[i],
+                         not (np.isnan(year_2024[i]) or np.isnan(inflation_amount[i])),
+                         tolerance, expected, difference, present, correct)
+        return expected, difference, present, correct
+
+    @njit(cache=True, error_model='numpy')
+    def variable_checks(five_month, five_month_days, per_day, yearly_days, amount_yearly,
+                        multiplier, inflation_amount, total, tolerance):
+        """All variable expense formulas in one pass over the items"""
+        n = five_month.shape[0]
+        expected = np.empty((5, n))
+        difference = np.empty((5, n))
+        present = np.empty((5, n), np.bool_)
+        correct = np.empty((5, n), np.bool_)
+        for i in range(n):
+            _store_check(0, i, yearly_days[i], (five_month_days[i] / 5) * 12, not np.isnan(five_month_days[i]),
+                         tolerance, expected, difference, present, correct)
+            _store_check(1, i, per_day[i], five_month[i] / five_month_days[i],
+                         not (np.isnan(five_month[i]) or np.isnan(five_month_days[i])),
+                         tolerance, expected, difference, present, correct)
+            _store_check(2, i, amount_yearly[i], per_day[i] * yearly_days[i],
+                         not (np.isnan(per_day[i]) or np.isnan(yearly_days[i])),
+                         tolerance, expected, difference, present, correct)
+            _store_check(3, i, inflation_amount[i], amount_yearly[i] * multiplier[i], not np.isnan(amount_yearly[i]),
+                         tolerance, expected, difference, present, correct)
+            _store_check(4, i, total[i], amount_yearly[i] + inflation_amount[i],
+                         not (np.isnan(amount_yearly[i]) or np.isnan(inflation_amount[i])),
+                         tolerance, expected, difference, present, correct)
+        return expected, difference, present, correct
+else:
+    fixed_checks = _fixed_checks_numpy
+    variable_checks = _variable_checks_numpy
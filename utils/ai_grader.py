@@ -1,49 +1,45 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Tuple
+import asyncio
 import json
-from openai import OpenAI
+import functools
+import os
+import time
+from io import BytesIO
+from openai import OpenAI, AsyncOpenAI
 import requests
+from requests.adapters import HTTPAdapter
+from utils.llm_cache import LLMCache, cache_key
+from utils.validator import BudgetValidator
+from utils.schemas import ExtractedBudget, GradingReport, GradingReportBatch
+from pydantic import ValidationError
 
-class AIGrader:
-    """AI-powered grading using LLMs for intelligent extraction and validation"""
-    
-    def __init__(self, provider: str = "openai", api_key: str = None, model: str = None):
-        self.provider = provider.lower()
-        self.api_key = api_key
-        self.model = model or self._get_default_model()
-        
-        # Initialize client
-        if self.provider == "openai":
-            self.client = OpenAI(api_key=api_key)
-        elif self.provider == "anthropic":
-            self.client = None
-        elif self.provider == "local":
-            self.ollama_url = "http://localhost:11434/api/generate"
-    
-    def _get_default_model(self) -> str:
-        """Get default model for provider"""
-        defaults = {
-            "openai": "gpt-4-turbo",
-            "anthropic": "claude-sonnet-4-5",
-            "local": "llama3"
-        }
-        return defaults.get(self.provider, "gpt-4-turbo")
-    
-    def grade(self, extracted_data: Dict[str, Any], inflation_rate: float = 5.0, tolerance: float = 0.5) -> Dict[str, Any]:
-        """Grade the assignment using AI"""
-        
-        # If PDF or needs AI extraction
-        if extracted_data.get('needs_ai_extraction'):
-            extracted_data = self._ai_extract_data(extracted_data.get('raw_text', ''))
-        
-        # Now validate with AI
-        validation_result = self._ai_validate(extracted_data, inflation_rate, tolerance)
-        
-        return validation_result
-    
-    def _ai_extract_data(self, raw_text: str) -> Dict[str, Any]:
-        """Use AI to extract structured data from raw text"""
-        
-        system_prompt = """You are a nursing budget data extraction assistant. Extract ALL numerical data from the student's supplies budget assignment.
+try:
+    from ollama import AsyncClient as OllamaAsyncClient
+except ImportError:
+    OllamaAsyncClient = None
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+# Concurrent local generations. The Ollama server only runs requests in parallel when
+# started with OLLAMA_NUM_PARALLEL (e.g. 4) and OLLAMA_MAX_LOADED_MODELS=1; use the
+# same value here so grade_many_async doesn't queue more than the server will run
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", 4))
+
+# Ollama (connect, read) timeouts in seconds; non-streamed generations reply only when done
+OLLAMA_TIMEOUT = (10, 300)
+
+# grade_many packs up to this many students into one validation request (fewer
+# requests per minute for the same tokens), within a rough prompt token budget
+MICRO_BATCH_SIZE = 5
+MICRO_BATCH_MAX_TOKENS = 12000
+CHARS_PER_TOKEN = 4  # Estimate for JSON text; close enough for budgeting
+
+# System prompts are module constants so every request shares a byte-identical
+# prefix (provider-side prompt caching); per-request values go in the user prompt
+EXTRACTION_SYSTEM_PROMPT = """You are a nursing budget data extraction assistant. Extract ALL numerical data from the student's supplies budget assignment.
 
 The assignment contains 3 tables:
 1. **Fixed Expenses** with columns: 5-month consumption, Monthly consumption, 2024-year consumption, Inflation rate, Inflation amount, Estimated 2025-year consumption
@@ -92,67 +88,7 @@ Extract and output as JSON with this EXACT structure:
 IMPORTANT: Extract ONLY the numbers the student provided. Do NOT calculate or correct anything. If a value is missing, use null.
 Return ONLY valid JSON, no markdown formatting or explanation."""
 
-        user_prompt = f"""Extract all budget data from this assignment:
-
-{raw_text}
-
-Return the data as JSON following the exact structure specified."""
-
-        # Call AI based on provider
-        if self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
-            result = response.choices[0].message.content
-        
-        elif self.provider == "anthropic":
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1
-            )
-            result = response.content[0].text
-        
-        elif self.provider == "local":
-            payload = {
-                "model": self.model,
-                "prompt": f"{system_prompt}\n\n{user_prompt}",
-                "stream": False,
-                "format": "json"
-            }
-            response = requests.post(self.ollama_url, json=payload)
-            result = response.json().get('response', '{}')
-        
-        # Parse JSON response
-        try:
-            # Clean up response (remove markdown if present)
-            result = result.strip()
-            if result.startswith('```json'):
-                result = result[7:]
-            if result.startswith('```'):
-                result = result[3:]
-            if result.endswith('```'):
-                result = result[:-3]
-            
-            extracted = json.loads(result.strip())
-            return extracted
-        except json.JSONDecodeError as e:
-            raise ValueError(f"AI returned invalid JSON: {e}\n\nResponse: {result}")
-    
-    def _ai_validate(self, extracted_data: Dict[str, Any], inflation_rate: float, tolerance: float) -> Dict[str, Any]:
-        """Use AI to validate calculations and provide detailed feedback"""
-        
-        system_prompt = f"""You are a nursing budget grading assistant. Validate student calculations against these formulas:
+VALIDATION_SYSTEM_PROMPT = """You are a nursing budget grading assistant. Validate student calculations against these formulas:
 
 **FIXED EXPENSES FORMULAS:**
 - Monthly consumption = 5-month consumption ÷ 5
@@ -174,8 +110,8 @@ Return the data as JSON following the exact structure specified."""
 - Total amount = Yearly consumption + Inflation amount
 
 **GRADING RULES:**
-- Expected inflation rate: {inflation_rate}%
-- Allow rounding differences up to ±{tolerance}
+- Use the expected inflation rate given in the request
+- Allow rounding differences up to the tolerance given in the request
 - Each correct calculation = 1 point
 - Mark as: ✅ Correct, ❌ Wrong (show expected vs actual), ⚠️ Missing
 
@@ -188,92 +124,560 @@ Generate a detailed grading report with:
 
 Return ONLY valid JSON with this structure:
 
-{{
+{
   "student_name": "Name",
   "department": "Department",
   "fixed_expenses_results": [
-    {{
+    {
       "description": "Office Supplies",
-      "validations": {{
-        "monthly_consumption": {{
+      "validations": {
+        "monthly_consumption": {
           "correct": true,
           "status": "✅ Correct",
           "expected": 100,
           "actual": 100
-        }},
-        "2024_year_consumption": {{
+        },
+        "2024_year_consumption": {
           "correct": false,
           "status": "❌ Incorrect (off by 12.50)",
           "expected": 1200,
           "actual": 1212.50
-        }}
-      }}
-    }}
+        }
+      }
+    }
   ],
   "variable_expenses_results": [ /* same structure */ ],
-  "total_expenses_results": {{
-    "5_month_consumption": {{ "correct": true, "status": "✅ Correct", "expected": 37750, "actual": 37750 }}
-  }},
+  "total_expenses_results": {
+    "5_month_consumption": { "correct": true, "status": "✅ Correct", "expected": 37750, "actual": 37750 }
+  },
   "correct_count": 45,
   "total_calculations": 50,
   "percentage": 90.0,
   "summary": "Brief summary of performance"
-}}
+}
 
 Be thorough - check EVERY calculation for EVERY item. Return ONLY JSON, no markdown."""
 
-        user_prompt = f"""Validate this student's budget and provide detailed grading:
+MICRO_BATCH_VALIDATION_SYSTEM_PROMPT = VALIDATION_SYSTEM_PROMPT + """
+
+You may receive SEVERAL students at once, as [{"student_id": "0", "data": {...}}, ...].
+Grade each student independently and return:
+
+{
+  "results": [
+    { "student_id": "0", "report": { /* grading report structure above */ } }
+  ]
+}
+
+Return exactly one result per student, with the student_id you were given."""
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(provider: str, api_key: str):
+    """SDK client per (provider, api_key), shared across AIGrader instances to reuse its connection pool"""
+    if provider == "openai":
+        return OpenAI(api_key=api_key)
+    if provider == "anthropic" and anthropic is not None:
+        return anthropic.Anthropic(api_key=api_key)
+    return None
+
 
-{json.dumps(extracted_data, indent=2)}
+def prompt_json(data: Any) -> str:
+    """Compact JSON for prompts; indentation and \\u escapes only cost input tokens"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+class AIGrader:
+    """AI-powered grading using LLMs for intelligent extraction and validation"""
+    
+    def __init__(self, provider: str = "openai", api_key: str = None, model: str = None, use_cache: bool = True,
+                 use_ai_validation: bool = False):
+        self.provider = provider.lower()
+        self.api_key = api_key
+        self.model = model or self._get_default_model()
+        # Arithmetic checks are deterministic; only ask the LLM when explicitly requested
+        self.use_ai_validation = use_ai_validation
+        
+        # Replies to identical prompts are reused from disk
+        self.cache = LLMCache() if use_cache else None
+        self.cache_stats = {"hits": 0, "misses": 0}
+        
+        # Initialize client
+        if self.provider == "openai":
+            self.client = _get_client(self.provider, api_key)
+            # Not shared: an async client's connections belong to the event loop that opened them
+            self.aclient = AsyncOpenAI(api_key=api_key)
+        elif self.provider == "anthropic":
+            self.client = _get_client(self.provider, api_key)
+        elif self.provider == "local":
+            self.ollama_host = "http://localhost:11434"
+            self.ollama_url = f"{self.ollama_host}/api/generate"
+            self.oclient = OllamaAsyncClient(host=self.ollama_host) if OllamaAsyncClient is not None else None
+            # Keep-alive connection pool, reused across calls (and worker threads)
+            self.session = requests.Session()
+            self.session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0))
+            self.session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+            self.session = None
+    
+    def __del__(self):
+        self.close()
+    
+    def _get_default_model(self) -> str:
+        """Get default model for provider"""
+        defaults = {
+            "openai": "gpt-4-turbo",
+            "anthropic": "claude-sonnet-4-5",
+            "local": "llama3"
+        }
+        return defaults.get(self.provider, "gpt-4-turbo")
+    
+    def grade(self, extracted_data: Dict[str, Any], inflation_rate: float = 5.0, tolerance: float = 0.5) -> Dict[str, Any]:
+        """Grade the assignment using AI"""
+        
+        # If PDF or needs AI extraction
+        if extracted_data.get('needs_ai_extraction'):
+            extracted_data = self._ai_extract_data(extracted_data.get('raw_text', ''))
+        
+        # Now validate (formulas first, the LLM only when they can't check anything)
+        validation_result = self._ai_validate(extracted_data, inflation_rate, tolerance)
+        
+        return validation_result
+    
+    def grade_batch(
+        self,
+        submissions: List[Dict[str, Any]],
+        inflation_rate: float = 5.0,
+        tolerance: float = 0.5,
+        poll_interval: float = 30.0
+    ) -> List[Dict[str, Any]]:
+        """Grade many assignments through the provider's batch API (reports in input order)"""
+        
+        # Extraction first, for the submissions that need it
+        needs_extraction = {
+            str(i): self._extract_prompts(data.get('raw_text', ''))
+            for i, data in enumerate(submissions)
+            if data.get('needs_ai_extraction')
+        }
+        extracted = self._run_batch(needs_extraction, ExtractedBudget, max_tokens=4000, poll_interval=poll_interval)
+        submissions = [
+            self._parse_json_response(extracted[str(i)], ExtractedBudget, "AI returned invalid JSON")
+            if str(i) in needs_extraction else data
+            for i, data in enumerate(submissions)
+        ]
+        
+        # Formula-based reports first; only the ones that need it go to the LLM
+        reports = self._rule_validate_many(submissions, inflation_rate, tolerance)
+        needs_validation = {
+            str(i): self._validate_prompts(data, inflation_rate, tolerance)
+            for i, (data, report) in enumerate(zip(submissions, reports))
+            if self._needs_ai_validation(data, report)
+        }
+        validations = self._run_batch(needs_validation, GradingReport, max_tokens=8000, poll_interval=poll_interval)
+        return [
+            self._parse_json_response(validations[str(i)], GradingReport, "AI validation returned invalid JSON")
+            if str(i) in needs_validation else report
+            for i, report in enumerate(reports)
+        ]
+    
+    def grade_many(
+        self,
+        submissions: List[Dict[str, Any]],
+        inflation_rate: float = 5.0,
+        tolerance: float = 0.5,
+        batch_size: int = MICRO_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
+        """Grade many assignments, validating several students per LLM request (reports in input order)"""
+        
+        submissions = [
+            self._ai_extract_data(data.get('raw_text', '')) if data.get('needs_ai_extraction') else data
+            for data in submissions
+        ]
+        
+        # Formula-based reports first; only the ones that need it go to the LLM
+        reports = self._rule_validate_many(submissions, inflation_rate, tolerance)
+        needs_validation = [
+            i for i, (data, report) in enumerate(zip(submissions, reports))
+            if self._needs_ai_validation(data, report)
+        ]
+        validated = self._ai_validate_micro_batch(
+            [submissions[i] for i in needs_validation], inflation_rate, tolerance, batch_size
+        )
+        for i, report in zip(needs_validation, validated):
+            reports[i] = report
+        
+        return reports
+    
+    async def grade_async(self, extracted_data: Dict[str, Any], inflation_rate: float = 5.0, tolerance: float = 0.5) -> Dict[str, Any]:
+        """Grade the assignment using AI without blocking the event loop"""
+        
+        if extracted_data.get('needs_ai_extraction'):
+            extracted_data = await self._ai_extract_data_async(extracted_data.get('raw_text', ''))
+        
+        return await self._ai_validate_async(extracted_data, inflation_rate, tolerance)
+    
+    async def grade_many_async(
+        self,
+        submissions: List[Dict[str, Any]],
+        inflation_rate: float = 5.0,
+        tolerance: float = 0.5,
+        max_concurrency: int = None
+    ) -> List[Dict[str, Any]]:
+        """Grade many assignments concurrently (reports in input order)"""
+        
+        # Cap in-flight requests to stay under provider rate limits
+        if max_concurrency is None:
+            max_concurrency = OLLAMA_NUM_PARALLEL if self.provider == "local" else 8
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def grade_one(extracted_data):
+            async with semaphore:
+                return await self.grade_async(extracted_data, inflation_rate, tolerance)
+        
+        return await asyncio.gather(*[grade_one(data) for data in submissions])
+    
+    def _ai_extract_data(self, raw_text: str) -> Dict[str, Any]:
+        """Use AI to extract structured data from raw text"""
+        return self._ask(self._extract_prompts(raw_text), ExtractedBudget, 4000, "AI returned invalid JSON")
+    
+    def _ai_validate(self, extracted_data: Dict[str, Any], inflation_rate: float, tolerance: float) -> Dict[str, Any]:
+        """Validate calculations (formula-based unless the LLM is needed, see _needs_ai_validation)"""
+        report = self._rule_validate(extracted_data, inflation_rate, tolerance)
+        if not self._needs_ai_validation(extracted_data, report):
+            return report
+        
+        prompts = self._validate_prompts(extracted_data, inflation_rate, tolerance)
+        return self._ask(prompts, GradingReport, 8000, "AI validation returned invalid JSON")
+    
+    def _ai_validate_micro_batch(
+        self,
+        list_of_extracted: List[Dict[str, Any]],
+        inflation_rate: float,
+        tolerance: float,
+        batch_size: int = MICRO_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
+        """LLM-validate several students per request and return their reports in input order"""
+        reports = []
+        for chunk in self._micro_batches(list_of_extracted, batch_size):
+            prompts = self._micro_batch_prompts(chunk, inflation_rate, tolerance)
+            parsed = self._ask(prompts, GradingReportBatch, 16000, "AI validation returned invalid JSON")
+            
+            by_id = {result['student_id']: result['report'] for result in parsed['results']}
+            for student_id in map(str, range(len(chunk))):
+                if student_id not in by_id:
+                    raise ValueError(f"AI validation returned no report for student {student_id} of the batch")
+                reports.append(by_id[student_id])
+        return reports
+    
+    def _micro_batches(self, list_of_extracted: List[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+        """Split submissions into chunks of at most batch_size within MICRO_BATCH_MAX_TOKENS"""
+        chunks, chunk, chunk_tokens = [], [], 0
+        for data in list_of_extracted:
+            tokens = len(prompt_json(data)) // CHARS_PER_TOKEN
+            if chunk and (len(chunk) >= batch_size or chunk_tokens + tokens > MICRO_BATCH_MAX_TOKENS):
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append(data)
+            chunk_tokens += tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    async def _ai_extract_data_async(self, raw_text: str) -> Dict[str, Any]:
+        """Async variant of _ai_extract_data"""
+        return await self._ask_async(self._extract_prompts(raw_text), ExtractedBudget, 4000, "AI returned invalid JSON")
+    
+    async def _ai_validate_async(self, extracted_data: Dict[str, Any], inflation_rate: float, tolerance: float) -> Dict[str, Any]:
+        """Async variant of _ai_validate"""
+        report = self._rule_validate(extracted_data, inflation_rate, tolerance)
+        if not self._needs_ai_validation(extracted_data, report):
+            return report
+        
+        prompts = self._validate_prompts(extracted_data, inflation_rate, tolerance)
+        return await self._ask_async(prompts, GradingReport, 8000, "AI validation returned invalid JSON")
+    
+    def _rule_validate(self, extracted_data: Dict[str, Any], inflation_rate: float, tolerance: float) -> Dict[str, Any]:
+        """Apply the grading formulas directly, without an LLM call"""
+        return BudgetValidator(inflation_rate=inflation_rate, tolerance=tolerance).validate(extracted_data)
+    
+    def _rule_validate_many(
+        self, submissions: List[Dict[str, Any]], inflation_rate: float, tolerance: float
+    ) -> List[Dict[str, Any]]:
+        """Formula-based reports for many students, checked together in one pass"""
+        return BudgetValidator(inflation_rate=inflation_rate, tolerance=tolerance).validate_many(submissions)
+    
+    def _needs_ai_validation(self, extracted_data: Dict[str, Any], report: Dict[str, Any]) -> bool:
+        """Whether to ask the LLM instead of trusting the formula-based report
+        
+        Only when forced with use_ai_validation, or when the submission has
+        expense rows but none of their values could be checked by formula.
+        """
+        if self.use_ai_validation:
+            return True
+        has_rows = bool(extracted_data.get('fixed_expenses') or extracted_data.get('variable_expenses'))
+        return has_rows and report['total_calculations'] == 0
+    
+    def _ask(self, prompts: Tuple[str, str], response_model: type, max_tokens: int, error_message: str) -> Dict[str, Any]:
+        """Complete a prompt pair and parse the JSON reply, going through the cache"""
+        key, cached = self._cache_lookup(*prompts)
+        if cached is not None:
+            return cached
+        
+        result = self._complete(*prompts, response_model, max_tokens=max_tokens)
+        parsed = self._parse_json_response(result, response_model, error_message)
+        self._cache_store(key, parsed)
+        return parsed
+    
+    async def _ask_async(self, prompts: Tuple[str, str], response_model: type, max_tokens: int, error_message: str) -> Dict[str, Any]:
+        """Async variant of _ask"""
+        key, cached = self._cache_lookup(*prompts)
+        if cached is not None:
+            return cached
+        
+        result = await self._complete_async(*prompts, response_model, max_tokens=max_tokens)
+        parsed = self._parse_json_response(result, response_model, error_message)
+        self._cache_store(key, parsed)
+        return parsed
+    
+    def _cache_lookup(self, system_prompt: str, user_prompt: str) -> Tuple[str, Any]:
+        """Return the cache key and the cached reply (None on a miss)"""
+        if self.cache is None:
+            return None, None
+        
+        key = cache_key(self.provider, self.model, system_prompt, user_prompt)
+        cached = self.cache.get(key)
+        if cached is None:
+            self.cache_stats["misses"] += 1
+        else:
+            self.cache_stats["hits"] += 1
+        return key, cached
+    
+    def _cache_store(self, key: str, parsed: Dict[str, Any]) -> None:
+        """Remember a successfully parsed reply"""
+        if self.cache is not None:
+            self.cache.set(key, parsed)
+    
+    def _extract_prompts(self, raw_text: str) -> Tuple[str, str]:
+        """System and user prompts for data extraction"""
+        user_prompt = f"""Extract all budget data from this assignment:
+
+{raw_text}
+
+Return the data as JSON following the exact structure specified."""
+
+        return EXTRACTION_SYSTEM_PROMPT, user_prompt
+    
+    def _validate_prompts(self, extracted_data: Dict[str, Any], inflation_rate: float, tolerance: float) -> Tuple[str, str]:
+        """System and user prompts for calculation validation"""
+        user_prompt = f"""Expected inflation rate: {inflation_rate}%
+Allow rounding differences up to ±{tolerance}
+
+Validate this student's budget and provide detailed grading:
+
+{prompt_json(extracted_data)}
 
 Check ALL formulas and calculations. Return detailed JSON report."""
 
-        # Call AI
+        return VALIDATION_SYSTEM_PROMPT, user_prompt
+    
+    def _micro_batch_prompts(self, chunk: List[Dict[str, Any]], inflation_rate: float, tolerance: float) -> Tuple[str, str]:
+        """System and user prompts for validating several students in one request"""
+        students = [{"student_id": str(i), "data": data} for i, data in enumerate(chunk)]
+        user_prompt = f"""Expected inflation rate: {inflation_rate}%
+Allow rounding differences up to ±{tolerance}
+
+Validate each of these {len(students)} students' budgets and provide detailed grading:
+
+{prompt_json(students)}
+
+Check ALL formulas and calculations. Return one detailed JSON report per student."""
+
+        return MICRO_BATCH_VALIDATION_SYSTEM_PROMPT, user_prompt
+    
+    def _openai_request(self, system_prompt: str, user_prompt: str, response_model: type) -> Dict[str, Any]:
+        """Chat completion parameters, shared by direct and batch calls"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.1,
+            # Structured outputs: the reply is guaranteed to match the schema
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": response_model.__name__,
+                    "schema": response_model.json_schema(),
+                    "strict": True
+                }
+            }
+        }
+    
+    def _anthropic_request(self, system_prompt: str, user_prompt: str, response_model: type, max_tokens: int) -> Dict[str, Any]:
+        """Messages API parameters, shared by direct and batch calls"""
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "system": system_prompt,
+            "messages": [
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.1,
+            # A forced tool call makes the model reply with schema-shaped input
+            "tools": [{
+                "name": "emit",
+                "description": "Return the result",
+                "input_schema": response_model.json_schema()
+            }],
+            "tool_choice": {"type": "tool", "name": "emit"}
+        }
+    
+    def _anthropic_tool_input(self, content: List[Any]) -> str:
+        """JSON text of the forced tool call in an Anthropic reply"""
+        for block in content:
+            if block.type == "tool_use":
+                return json.dumps(block.input)
+        return '{}'
+    
+    def _ollama_payload(self, system_prompt: str, user_prompt: str, response_model: type) -> Dict[str, Any]:
+        """/api/generate parameters; format takes a JSON schema to constrain the reply"""
+        return {
+            "model": self.model,
+            "prompt": f"{system_prompt}\n\n{user_prompt}",
+            "stream": False,
+            "format": response_model.json_schema()
+        }
+    
+    def _complete(self, system_prompt: str, user_prompt: str, response_model: type, max_tokens: int) -> str:
+        """Send one prompt to the configured provider and return the raw text reply"""
+        
+        # Call AI based on provider
         if self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+            response = self.client.chat.completions.create(**self._openai_request(system_prompt, user_prompt, response_model))
             result = response.choices[0].message.content
         
         elif self.provider == "anthropic":
             response = self.client.messages.create(
-                model=self.model,
-                max_tokens=8000,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1
+                **self._anthropic_request(system_prompt, user_prompt, response_model, max_tokens)
             )
-            result = response.content[0].text
+            result = self._anthropic_tool_input(response.content)
         
         elif self.provider == "local":
-            payload = {
-                "model": self.model,
-                "prompt": f"{system_prompt}\n\n{user_prompt}",
-                "stream": False,
-                "format": "json"
-            }
-            response = requests.post(self.ollama_url, json=payload)
+            payload = self._ollama_payload(system_prompt, user_prompt, response_model)
+            response = self.session.post(self.ollama_url, json=payload, timeout=OLLAMA_TIMEOUT)
             result = response.json().get('response', '{}')
         
-        # Parse response
-        try:
-            result = result.strip()
-            if result.startswith('```json'):
-                result = result[7:]
-            if result.startswith('```'):
-                result = result[3:]
-            if result.endswith('```'):
-                result = result[:-3]
+        return result
+    
+    async def _complete_async(self, system_prompt: str, user_prompt: str, response_model: type, max_tokens: int) -> str:
+        """Async variant of _complete"""
+        
+        if self.provider == "openai":
+            response = await self.aclient.chat.completions.create(
+                **self._openai_request(system_prompt, user_prompt, response_model)
+            )
+            return response.choices[0].message.content
+        
+        elif self.provider == "local" and self.oclient is not None:
+            response = await self.oclient.generate(**self._ollama_payload(system_prompt, user_prompt, response_model))
+            return response['response'] or '{}'
+        
+        # Anthropic / local Ollama: run the blocking call in a worker thread
+        return await asyncio.to_thread(self._complete, system_prompt, user_prompt, response_model, max_tokens)
+    
+    def _run_batch(
+        self,
+        prompts: Dict[str, Tuple[str, str]],
+        response_model: type,
+        max_tokens: int,
+        poll_interval: float = 30.0
+    ) -> Dict[str, str]:
+        """Send {custom_id: (system, user)} prompts as one batch job and return {custom_id: raw reply}"""
+        
+        if not prompts:
+            return {}
+        
+        if self.provider == "openai":
+            lines = [
+                json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._openai_request(system_prompt, user_prompt, response_model)
+                })
+                for custom_id, (system_prompt, user_prompt) in prompts.items()
+            ]
+            batch_file = self.client.files.create(
+                file=("batch.jsonl", BytesIO("\n".join(lines).encode("utf-8"))),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+            if batch.status != "completed":
+                raise ValueError(f"AI batch {batch.id} ended with status '{batch.status}'")
             
-            report = json.loads(result.strip())
-            return report
-        except json.JSONDecodeError as e:
-            raise ValueError(f"AI validation returned invalid JSON: {e}\n\nResponse: {result}")
\ No newline at end of file
+            # Failed requests are written to the error file, not the output file
+            results = {}
+            failures = {}
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                for line in self.client.files.content(file_id).text.splitlines():
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    response = entry.get("response") or {}
+                    if entry.get("error") or response.get("status_code") != 200:
+                        failures[entry["custom_id"]] = entry.get("error") or response
+                    else:
+                        results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            if failures:
+                raise ValueError(f"AI batch {batch.id} requests failed: {failures}")
+            missing = sorted(set(prompts) - set(results))
+            if missing:
+                raise ValueError(f"AI batch {batch.id} returned no result for requests: {', '.join(missing)}")
+            return results
+        
+        elif self.provider == "anthropic":
+            batch = self.client.messages.batches.create(requests=[
+                {
+                    "custom_id": custom_id,
+                    "params": self._anthropic_request(system_prompt, user_prompt, response_model, max_tokens)
+                }
+                for custom_id, (system_prompt, user_prompt) in prompts.items()
+            ])
+            while batch.processing_status != "ended":
+                time.sleep(poll_interval)
+                batch = self.client.messages.batches.retrieve(batch.id)
+            
+            results = {}
+            for entry in self.client.messages.batches.results(batch.id):
+                if entry.result.type != "succeeded":
+                    raise ValueError(f"AI batch request {entry.custom_id} failed: {entry.result.type}")
+                results[entry.custom_id] = self._anthropic_tool_input(entry.result.message.content)
+            return results
+        
+        # No batch endpoint for local models; run the prompts one by one
+        return {
+            custom_id: self._complete(system_prompt, user_prompt, response_model, max_tokens)
+            for custom_id, (system_prompt, user_prompt) in prompts.items()
+        }
+    
+    def _parse_json_response(self, result: str, response_model: type, error_message: str) -> Dict[str, Any]:
+        """Validate a schema-constrained JSON reply and return it as a plain dict"""
+        try:
+            return response_model.model_validate_json(result).to_dict()
+        except ValidationError as e:
+            raise ValueError(f"{error_message}: {e}\n\nResponse: {result}")
@@ -0,0 +1,57 @@
+from typing import Any, Optional
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_EXPIRE = 7 * 86400  # One week
+
+
+def cache_key(provider: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    """SHA-256 of everything that determines an LLM reply"""
+    payload = json.dumps(
+        {"provider": provider, "model": model, "system": system_prompt, "user": user_prompt},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """On-disk cache of parsed LLM replies, one JSON file per key"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, expire: float = DEFAULT_EXPIRE):
+        self.directory = directory
+        self.expire = expire
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing, expired or unreadable"""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires") is not None and entry["expires"] < time.time():
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> None:
+        """Store a JSON-serializable value"""
+        expire = self.expire if expire is None else expire
+        entry = {"expires": time.time() + expire if expire else None, "value": value}
+
+        # Write to a temp file and rename, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -1,29 +1,212 @@
 import docx
-import openpyxl
 from pypdf import PdfReader
+import copy
+import hashlib
+import os
 import re
-import pandas as pd
-from typing import Dict, List, Any
+import zipfile
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 from utils.column_mappings import FIXED_MAPPINGS, VARIABLE_MAPPINGS
 
+try:
+    import pymupdf  # Native MuPDF text/table extraction, much faster than pypdf
+except ImportError:
+    pymupdf = None
+
+try:
+    import pypdfium2 as pdfium  # PDFium text extraction when PyMuPDF isn't installed
+except ImportError:
+    pdfium = None
+
+try:
+    from python_calamine import CalamineWorkbook  # Rust XLSX reader, much faster than openpyxl
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    from rapidfuzz import fuzz, process  # Fuzzy header matching for columns the keyword rules miss
+except ImportError:
+    fuzz = process = None
+
+# PDFs with at least this many pages are split across worker processes
+PARALLEL_PDF_MIN_PAGES = 8
+
+# Raw PDF text kept for AI extraction is truncated to this budget; the pdfium and
+# pypdf fallbacks also stop reading pages once they reach it
+MAX_PDF_TEXT_CHARS = 200_000
+
+# Parsed results shared by every DocumentParser, keyed by file content hash
+PARSE_CACHE_SIZE = 32
+
+# Regexes are compiled once at import instead of per call / per table row
+# Name patterns are tried in priority order. Kept as separate searches: one fused
+# alternation either loses the priority ("Student Name: ..." matches the bare-name
+# branch first) or, wrapped in lookaheads to keep it, is >10x slower than three scans
+NAME_PATTERNS = [
+    re.compile(r'(?:Student|Name|By|Author):\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)', re.MULTILINE),
+    re.compile(r'^([A-Z][a-z]+\s+[A-Z][a-z]+)', re.MULTILINE),  # First line with capitalized name
+    re.compile(r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*\n', re.MULTILINE),
+]
+DEPARTMENT_KEYWORDS = [
+    'Emergency Department', 'ED', 'ER', 'Emergency Room',
+    'Neonatal Intensive Care', 'NICU', 'ICU',
+    'Pediatric', 'Surgical', 'Medical',
+    'Nursing', 'HSON', 'Hariri School'
+]
+# One case-insensitive search per keyword, in priority order. Measured faster than a
+# fused single-pass scan: short keywords like "ED"/"ER" hit inside ordinary words
+# ("used", "order"), so a fused scan stops in Python at nearly every word
+DEPARTMENT_PATTERNS = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in DEPARTMENT_KEYWORDS]
+SKIP_ROW_PATTERN = re.compile(r'\b(?:total|subtotal|sum)\b')  # Whole words only, not substrings
+CLEAN_TEXT_PATTERN = re.compile(r'[^\w\s\-/(),.]')
+NUMBER_PATTERN = re.compile(r'-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?')
+CURRENCY_STRIP_TABLE = str.maketrans('', '', '$,% \t\r\n\f\v\xa0')  # Currency symbols, commas, percent signs, spaces
+ACTIVE_TAB_PATTERN = re.compile(rb'<(?:\w+:)?workbookView\b[^>]*\bactiveTab="(\d+)"')
+# Formula/unit notes after a header, e.g. "monthly consumption (=5 month consumption/5)"
+HEADER_NOTE_PATTERN = re.compile(r'\s*[(=\[].*$')
+# Unit markers kept from a stripped unit note: "inflation (%)" is the rate, "inflation ($)" the amount.
+# Formula notes ("= amount x 10%") have digits or '=' and keep nothing
+HEADER_UNIT_MARKERS = ('%', '$')
+HEADER_FORMULA_NOTE_PATTERN = re.compile(r'[=\d]')
+
+# Canonical header per column key, for fuzzy matching of columns the keyword rules miss
+FIXED_CANONICAL_HEADERS = {
+    '5_month': '5 month consumption',
+    'monthly': 'monthly consumption',
+    '2024_year': '2024 year consumption',
+    '2025_estimate': 'estimated 2025 year consumption',
+    'inflation_rate': 'inflation rate',
+    'inflation_amount': 'inflation amount',
+}
+VARIABLE_CANONICAL_HEADERS = {
+    '5_month_cons': '5 month consumption',
+    '5_month_days': '5 month patient days',
+    'cons_per_day': 'consumption per patient day',
+    'yearly_days': 'estimated 2025 yearly pt days',
+    'yearly_amount': 'amount per yearly pt days',
+    'inflation_rate': 'inflation rate',
+    'inflation_amount': 'inflation amount',
+    'total': 'total amount',
+}
+TOTAL_CANONICAL_HEADERS = {
+    '5_month': '5 month consumption',
+    'yearly': 'yearly consumption',
+    'inflation_rate': 'inflation rate',
+    'inflation_amount': 'inflation amount',
+    'total': 'total amount',
+}
+FUZZY_HEADER_MIN_SCORE = 70
+# Unit marker that settles equal fuzzy scores between rate and amount columns
+FUZZY_UNIT_MARKERS = {'inflation_rate': '%', 'inflation_amount': '$'}
+
+# Header keyword flags used to classify a table from one pass over its headers
+HEADER_FIXED = 1
+HEADER_MONTHLY = 2
+HEADER_2024 = 4
+HEADER_VARIABLE = 8  # "variable", "pt day" or "patient day"
+HEADER_TOTAL = 16
+HEADER_YEARLY_OR_INFLATION = 32
+
+
+def _extract_pdf_pages(pdf_bytes: bytes, start: int, stop: int):
+    """Extract text and ruled tables from pages [start, stop) of a PDF"""
+    texts = []
+    tables_data = []
+    with pymupdf.open(stream=pdf_bytes, filetype='pdf') as doc:
+        for page in doc.pages(start, stop):
+            texts.append(page.get_text())
+            for table in page.find_tables().tables:
+                tables_data.append(table.extract())
+    return texts, tables_data
+
+# Worker processes for large PDFs. Started on first use and kept for the life of the
+# server, since spawning a worker (fresh interpreter + imports) costs ~0.5 s. The lock
+# stops concurrent Streamlit sessions from each starting (and leaking) a pool
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Shared PDF worker pool, one process per CPU"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # "spawn" avoids forking the multi-threaded Streamlit server
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next large PDF starts a new one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        # Another session may already have replaced it
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Callers usually build a fresh DocumentParser per file, so the cache lives at module
+# level; the lock keeps LRU bookkeeping consistent across Streamlit session threads
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
 class DocumentParser:
     """Parse Word, Excel, and PDF documents to extract budget data"""
     
     def __init__(self):
         self.supported_formats = ['.docx', '.xlsx', '.pdf']
     
-    def parse(self, uploaded_file) -> Dict[str, Any]:
-        """Main parsing function - routes to appropriate parser"""
-        file_extension = uploaded_file.name.split('.')[-1].lower()
+    def parse(self, uploaded_file, file_name: str = None) -> Dict[str, Any]:
+        """Main parsing function - routes to appropriate parser
+        
+        Accepts a named file-like object (e.g. a Streamlit upload) or raw
+        bytes together with the original file name. Re-parsing the same
+        content returns a copy of the cached result.
+        """
+        if isinstance(uploaded_file, (bytes, bytearray)):
+            file_bytes = bytes(uploaded_file)
+        else:
+            file_name = file_name or uploaded_file.name
+            file_bytes = uploaded_file.read()
+            uploaded_file.seek(0)
+        file_extension = file_name.split('.')[-1].lower()
+        
+        if file_extension not in ('docx', 'xlsx', 'pdf'):
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        # Same bytes parsed as the same format always give the same result
+        key = (file_extension, hashlib.sha256(file_bytes).hexdigest())
+        with _parse_cache_lock:
+            cached = _parse_cache.get(key)
+            if cached is not None:
+                _parse_cache.move_to_end(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
         
         if file_extension == 'docx':
-            return self.parse_word(uploaded_file)
+            result = self.parse_word(BytesIO(file_bytes))
         elif file_extension == 'xlsx':
-            return self.parse_excel(uploaded_file)
-        elif file_extension == 'pdf':
-            return self.parse_pdf(uploaded_file)
+            result = self.parse_excel(BytesIO(file_bytes))
         else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+            result = self.parse_pdf(BytesIO(file_bytes))
+        
+        cached = copy.deepcopy(result)
+        with _parse_cache_lock:
+            _parse_cache[key] = cached
+            if len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+        return result
     
     def parse_word(self, uploaded_file) -> Dict[str, Any]:
         """Parse Word document"""
@@ -34,17 +217,8 @@ class DocumentParser:
         student_name = self._extract_student_name(full_text)
         department = self._extract_department(full_text)
         
-        # Extract tables
-        tables_data = []
-        for table in doc.tables:
-            table_data = []
-            for row in table.rows:
-                row_data = [cell.text.strip() for cell in row.cells]
-                table_data.append(row_data)
-            tables_data.append(table_data)
-        
-        # Parse budget data from tables
-        parsed_data = self._parse_budget_tables(tables_data)
+        # Parse budget data from tables, reading one table at a time
+        parsed_data = self._parse_budget_tables(self._iter_word_tables(doc))
         
         return {
             'student_name': student_name,
@@ -52,23 +226,39 @@ class DocumentParser:
             **parsed_data
         }
     
+    def _iter_word_tables(self, doc) -> Iterator[List[List[str]]]:
+        """Yield each Word table's cell text, so only one table is held at a time"""
+        for table in doc.tables:
+            # row.cells rebuilds the whole table's cell grid on every call (quadratic in
+            # rows); build the grid once and slice it per row, with the same spans/merges
+            grid = table._cells
+            col_count = table._column_count
+            texts = {}  # Merged cells repeat the same <w:tc>; read each one once
+            
+            rows = []
+            for row_idx in range(len(table.rows)):
+                row_data = []
+                for cell in grid[row_idx * col_count:(row_idx + 1) * col_count]:
+                    tc = cell._tc
+                    if tc not in texts:
+                        # Same text as cell.text, without the Paragraph wrappers
+                        texts[tc] = '\n'.join(p.text for p in tc.p_lst).strip()
+                    row_data.append(texts[tc])
+                rows.append(row_data)
+            yield rows
+    
     def parse_excel(self, uploaded_file) -> Dict[str, Any]:
         """Parse Excel document"""
-        wb = openpyxl.load_workbook(uploaded_file)
-        ws = wb.active
-        
         # Extract all data
-        all_data = []
-        for row in ws.iter_rows(values_only=True):
-            all_data.append(list(row))
+        all_data = self._read_excel_rows(uploaded_file.read())
         
         # Extract student info from first few rows
         full_text = ' '.join([str(cell) for row in all_data[:10] for cell in row if cell])
         student_name = self._extract_student_name(full_text)
         department = self._extract_department(full_text)
         
-        # Parse budget tables
-        parsed_data = self._parse_budget_tables([all_data])
+        # Parse budget tables (one sheet usually holds every section)
+        parsed_data = self._parse_budget_tables(self._split_sheet_tables(all_data))
         
         return {
             'student_name': student_name,
@@ -76,38 +266,176 @@ class DocumentParser:
             **parsed_data
         }
     
+    def _split_sheet_tables(self, rows: List[List[Any]]) -> Iterator[List[List[Any]]]:
+        """Split sheet rows into tables at each section header row, dropping empty rows"""
+        table = []
+        for row in rows:
+            if not any(cell is not None and str(cell).strip() for cell in row):
+                continue
+            if table and self._is_section_header(row):
+                # A section title ("Variable Expenses") opens the next table, not the end of this one
+                if self._is_title_row(table[-1]):
+                    table.pop()
+                if table:
+                    yield table
+                table = []
+            table.append(row)
+        if table:
+            yield table
+    
+    def _is_title_row(self, row: List[Any]) -> bool:
+        """Whether a sheet row is a bare title: under 3 text cells and no numbers"""
+        cells = [str(cell).strip() for cell in row if cell is not None and str(cell).strip()]
+        if len(cells) >= 3:
+            return False
+        return not any(
+            isinstance(cell, (int, float)) or NUMBER_PATTERN.fullmatch(str(cell).strip())
+            for cell in row if cell is not None
+        )
+    
+    def _is_section_header(self, row: List[Any]) -> bool:
+        """Whether a sheet row is the header row of a fixed/variable/total table"""
+        headers = [str(cell).lower().strip() for cell in row if cell is not None]
+        # Header rows are mostly text; data rows like "1,000 patient days" only mention a keyword
+        if sum(1 for h in headers if any(c.isalpha() for c in h)) < 3:
+            return False
+        flags = self._header_flags(headers)
+        return bool(
+            flags & (HEADER_FIXED | HEADER_VARIABLE) or
+            flags & (HEADER_MONTHLY | HEADER_2024) == HEADER_MONTHLY | HEADER_2024 or
+            flags & (HEADER_TOTAL | HEADER_YEARLY_OR_INFLATION) == HEADER_TOTAL | HEADER_YEARLY_OR_INFLATION
+        )
+    
+    def _read_excel_rows(self, file_bytes: bytes) -> List[List[Any]]:
+        """Cell values of the active sheet, row by row (empty cells are None)"""
+        if CalamineWorkbook is not None:
+            try:
+                return self._read_excel_calamine(file_bytes)
+            except Exception:
+                pass  # Let openpyxl handle files calamine can't read
+        
+        # Only import openpyxl (~0.2 s) when the fallback is actually needed
+        import openpyxl
+        
+        # Streaming reader with computed (cached) values instead of formula text
+        wb = openpyxl.load_workbook(BytesIO(file_bytes), read_only=True, data_only=True)
+        try:
+            return [list(row) for row in wb.active.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+    
+    def _read_excel_calamine(self, file_bytes: bytes) -> List[List[Any]]:
+        """Read the active sheet with calamine, laid out like openpyxl's values"""
+        # Same sheet openpyxl calls "active": the workbook view's activeTab
+        with zipfile.ZipFile(BytesIO(file_bytes)) as archive:
+            match = ACTIVE_TAB_PATTERN.search(archive.read('xl/workbook.xml'))
+        sheet_index = int(match.group(1)) if match else 0
+        
+        wb = CalamineWorkbook.from_filelike(BytesIO(file_bytes))
+        try:
+            rows = wb.get_sheet_by_index(sheet_index).to_python(skip_empty_area=False)
+        finally:
+            wb.close()
+        return [[None if cell == '' else cell for cell in row] for row in rows]
+    
     def parse_pdf(self, uploaded_file) -> Dict[str, Any]:
         """Parse PDF document"""
-        pdf_reader = PdfReader(uploaded_file)
-        
-        # Extract text from all pages
-        full_text = ''
-        for page in pdf_reader.pages:
-            full_text += page.extract_text()
+        if pymupdf is not None:
+            full_text, tables_data = self._read_pdf_pymupdf(uploaded_file)
+        elif pdfium is not None:
+            full_text, tables_data = self._read_pdf_pdfium(uploaded_file), []
+        else:
+            full_text, tables_data = self._read_pdf_pypdf(uploaded_file), []
         
         student_name = self._extract_student_name(full_text)
         department = self._extract_department(full_text)
         
-        # For PDFs, we'll rely more on AI extraction since table parsing is harder
-        # Return raw text for AI to process
+        # Parse whatever tables the backend could detect; if no budget rows
+        # come out of them, return raw text for AI to process
+        parsed_data = self._parse_budget_tables(tables_data)
+        needs_ai_extraction = not (parsed_data['fixed_expenses'] or parsed_data['variable_expenses'])
+        
         return {
             'student_name': student_name,
             'department': department,
+            **parsed_data,
             'raw_text': full_text,
-            'needs_ai_extraction': True
+            'needs_ai_extraction': needs_ai_extraction
         }
     
+    def _read_pdf_pymupdf(self, uploaded_file):
+        """Extract page text and ruled tables with PyMuPDF"""
+        pdf_bytes = uploaded_file.read()
+        with pymupdf.open(stream=pdf_bytes, filetype='pdf') as doc:
+            page_count = doc.page_count
+        
+        workers = min(os.cpu_count() or 1, page_count)
+        if page_count < PARALLEL_PDF_MIN_PAGES or workers < 2:
+            texts, tables_data = _extract_pdf_pages(pdf_bytes, 0, page_count)
+            return ''.join(texts)[:MAX_PDF_TEXT_CHARS], tables_data
+        
+        # MuPDF documents cannot be shared between threads, so each worker
+        # process opens its own copy and handles a contiguous page range
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        pool = _get_pdf_pool()
+        try:
+            chunks = list(pool.map(_extract_pdf_pages, [pdf_bytes] * workers, bounds[:-1], bounds[1:]))
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and finish this file here
+            _discard_pdf_pool(pool)
+            texts, tables_data = _extract_pdf_pages(pdf_bytes, 0, page_count)
+            return ''.join(texts)[:MAX_PDF_TEXT_CHARS], tables_data
+        
+        # Merge in document order
+        texts = [text for chunk_texts, _ in chunks for text in chunk_texts]
+        tables_data = [table for _, chunk_tables in chunks for table in chunk_tables]
+        return ''.join(texts)[:MAX_PDF_TEXT_CHARS], tables_data
+    
+    def _read_pdf_pdfium(self, uploaded_file) -> str:
+        """Extract page text with PDFium (no table detection)"""
+        pdf = pdfium.PdfDocument(uploaded_file.read())
+        try:
+            # Extract text page by page until the size budget is reached
+            parts = []
+            total_chars = 0
+            for index in range(len(pdf)):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                # PDFium separates lines with \r\n; match the other backends
+                text = text.replace('\r\n', '\n')
+                parts.append(text)
+                total_chars += len(text)
+                if total_chars >= MAX_PDF_TEXT_CHARS:
+                    break
+        finally:
+            pdf.close()
+        return '\n'.join(parts)[:MAX_PDF_TEXT_CHARS]
+    
+    def _read_pdf_pypdf(self, uploaded_file) -> str:
+        """Extract page text with pypdf (fallback when PyMuPDF is unavailable)"""
+        pdf_reader = PdfReader(uploaded_file)
+        
+        # Extract text page by page until the size budget is reached
+        parts = []
+        total_chars = 0
+        for page in pdf_reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            total_chars += len(text)
+            if total_chars >= MAX_PDF_TEXT_CHARS:
+                break
+        return '\n'.join(parts)[:MAX_PDF_TEXT_CHARS]
+    
     def _extract_student_name(self, text: str) -> str:
         """Extract student name from text"""
         # Common patterns
-        patterns = [
-            r'(?:Student|Name|By|Author):\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)',
-            r'^([A-Z][a-z]+\s+[A-Z][a-z]+)',  # First line with capitalized name
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*\n',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE)
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
@@ -115,26 +443,22 @@ class DocumentParser:
     
     def _extract_department(self, text: str) -> str:
         """Extract department/unit from text"""
-        # Look for department keywords
-        dept_keywords = [
-            'Emergency Department', 'ED', 'ER', 'Emergency Room',
-            'Neonatal Intensive Care', 'NICU', 'ICU',
-            'Pediatric', 'Surgical', 'Medical',
-            'Nursing', 'HSON', 'Hariri School'
-        ]
-        
-        for keyword in dept_keywords:
-            if keyword.lower() in text.lower():
-                # Try to extract full context
-                pattern = rf'([^.]*{re.escape(keyword)}[^.]*)'
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    return match.group(1).strip()[:100]  # Limit length
+        # The first keyword in the list that appears anywhere wins
+        for keyword, pattern in zip(DEPARTMENT_KEYWORDS, DEPARTMENT_PATTERNS):
+            match = pattern.search(text)
+            if match:
+                # Return the sentence around its first occurrence
+                start = match.start()
+                sentence_start = text.rfind('.', 0, start) + 1
+                sentence_end = text.find('.', start + len(keyword))
+                if sentence_end == -1:
+                    sentence_end = len(text)
+                return text[sentence_start:sentence_end].strip()[:100]  # Limit length
         
         return "Unknown Department"
     
-    def _parse_budget_tables(self, tables_data: List[List[List[str]]]) -> Dict[str, Any]:
-        """Parse budget tables to extract structured data"""
+    def _parse_budget_tables(self, tables_data: Iterable[List[List[str]]]) -> Dict[str, Any]:
+        """Parse budget tables to extract structured data (any iterable of tables, consumed once)"""
         
         result = {
             'fixed_expenses': [],
@@ -150,21 +474,20 @@ class DocumentParser:
             # Identify table type by headers
             headers = [str(cell).lower().strip() for cell in table[0]]
             
+            flags = self._header_flags(headers)
+            
             # Check if it's Fixed Expenses table
             # Look for: "fixed" keyword OR ("monthly" AND "2024" columns)
-            is_fixed = (any('fixed' in h for h in headers) or
-                       (any('monthly' in h for h in headers) and
-                        any('2024' in h for h in headers)))
+            is_fixed = (flags & HEADER_FIXED or
+                       flags & (HEADER_MONTHLY | HEADER_2024) == HEADER_MONTHLY | HEADER_2024)
 
             # Check if it's Variable Expenses table
             # Look for: "variable" keyword OR ("pt day" OR "patient day" columns)
-            is_variable = (any('variable' in h for h in headers) or
-                          any('pt day' in h or 'patient day' in h for h in headers))
+            is_variable = flags & HEADER_VARIABLE
 
             # Check if it's Total Expenses table
             # Look for: ("total" AND column headers like "yearly total" or "inflation")
-            is_total = (any('total' in h for h in headers) and
-                       any('yearly' in h or 'inflation' in h for h in headers) and
+            is_total = (flags & (HEADER_TOTAL | HEADER_YEARLY_OR_INFLATION) == HEADER_TOTAL | HEADER_YEARLY_OR_INFLATION and
                        len(table) <= 3)  # Total table is usually 1-2 rows
 
             if is_fixed:
@@ -174,12 +497,32 @@ class DocumentParser:
             elif is_total:
                 result['total_expenses'] = self._parse_total_table(table)
             
-            # Check for initial patient days table
-            elif any('patient days' in str(cell).lower() for row in table for cell in row):
-                result['patient_days_initial'] = self._extract_patient_days(table)
+            # Check for initial patient days table (found and read in one scan)
+            else:
+                found, patient_days = self._extract_patient_days(table)
+                if found:
+                    result['patient_days_initial'] = patient_days
         
         return result
     
+    def _header_flags(self, headers: List[str]) -> int:
+        """HEADER_* flags for the keywords found in any of the headers"""
+        flags = 0
+        for h in headers:
+            if 'fixed' in h:
+                flags |= HEADER_FIXED
+            if 'monthly' in h:
+                flags |= HEADER_MONTHLY
+            if '2024' in h:
+                flags |= HEADER_2024
+            if 'variable' in h or 'pt day' in h or 'patient day' in h:
+                flags |= HEADER_VARIABLE
+            if 'total' in h:
+                flags |= HEADER_TOTAL
+            if 'yearly' in h or 'inflation' in h:
+                flags |= HEADER_YEARLY_OR_INFLATION
+        return flags
+    
     def _parse_fixed_table(self, table: List[List[str]]) -> List[Dict[str, Any]]:
         """Parse fixed expenses table with flexible column detection"""
         fixed_items = []
@@ -197,11 +540,13 @@ class DocumentParser:
             # Split and rejoin to normalize whitespace
             h = ' '.join(h.split())
             headers.append(h)
+        # Keyword rules look at the header text before any formula/unit note
+        match_headers = [self._strip_header_note(h) for h in headers]
 
         # Find column indices by matching keywords
         # Process in priority order: check 2025 before 2024 to avoid conflicts
         col_map = {}
-        for i, h in enumerate(headers):
+        for i, h in enumerate(match_headers):
             if any(kw in h for kw in ['description', 'expense', 'item']):
                 col_map['description'] = i
             elif '5' in h and 'month' in h:
@@ -241,33 +586,18 @@ class DocumentParser:
                     else:
                         col_map[field] = idx
 
-        # Parse data rows
-        for row in table[1:]:
-            if not row or len(row) < 3:
-                continue
-
-            try:
-                item = {
-                    'description': self._clean_text(row[col_map.get('description', 0)]),
-                    '5_month_consumption': self._parse_number(row[col_map['5_month']]) if '5_month' in col_map else None,
-                    'monthly_consumption': self._parse_number(row[col_map['monthly']]) if 'monthly' in col_map else None,
-                    '2024_year_consumption': self._parse_number(row[col_map['2024_year']]) if '2024_year' in col_map else None,
-                    'inflation_rate': self._parse_number(row[col_map['inflation_rate']]) if 'inflation_rate' in col_map else None,
-                    'inflation_amount': self._parse_number(row[col_map['inflation_amount']]) if 'inflation_amount' in col_map else None,
-                    'estimated_2025_consumption': self._parse_number(row[col_map['2025_estimate']]) if '2025_estimate' in col_map else None
-                }
-
-                # Skip subtotal and total rows (use word boundaries)
-                desc_lower = item['description'].lower()
-                # Check for whole words only, not substrings
-                import re
-                skip_pattern = r'\b(total|subtotal|sum)\b'
-                if item['description'] and not re.search(skip_pattern, desc_lower):
-                    fixed_items.append(item)
-            except (ValueError, IndexError, KeyError):
-                continue
-
-        return fixed_items
+        # Last resort for columns still unmapped: fuzzy header similarity
+        self._fuzzy_match_columns(match_headers, col_map, FIXED_CANONICAL_HEADERS)
+
+        # Parse data rows, one column at a time
+        return self._parse_rows(table, col_map, [
+            ('5_month_consumption', '5_month'),
+            ('monthly_consumption', 'monthly'),
+            ('2024_year_consumption', '2024_year'),
+            ('inflation_rate', 'inflation_rate'),
+            ('inflation_amount', 'inflation_amount'),
+            ('estimated_2025_consumption', '2025_estimate'),
+        ])
     
     def _parse_variable_table(self, table: List[List[str]]) -> List[Dict[str, Any]]:
         """Parse variable expenses table with flexible column detection"""
@@ -286,11 +616,13 @@ class DocumentParser:
             # Split and rejoin to normalize whitespace
             h = ' '.join(h.split())
             headers.append(h)
+        # Keyword rules look at the header text before any formula/unit note
+        match_headers = [self._strip_header_note(h) for h in headers]
 
         # Find column indices by matching keywords
         # Be specific: check more specific conditions first
         col_map = {}
-        for i, h in enumerate(headers):
+        for i, h in enumerate(match_headers):
             # Description column
             if any(kw in h for kw in ['description', 'item']) and not any(x in h for x in ['consumption', 'amount', 'day']):
                 col_map['description'] = i
@@ -336,35 +668,20 @@ class DocumentParser:
                 if field not in col_map:
                     col_map[field] = idx
 
-        # Parse data rows
-        for row in table[1:]:
-            if not row or len(row) < 3:
-                continue
-
-            try:
-                item = {
-                    'description': self._clean_text(row[col_map.get('description', 0)]),
-                    '5_month_consumption': self._parse_number(row[col_map['5_month_cons']]) if '5_month_cons' in col_map else None,
-                    '5_month_patient_days': self._parse_number(row[col_map['5_month_days']]) if '5_month_days' in col_map else None,
-                    'consumption_per_patient_day': self._parse_number(row[col_map['cons_per_day']]) if 'cons_per_day' in col_map else None,
-                    'estimated_2025_yearly_pt_days': self._parse_number(row[col_map['yearly_days']]) if 'yearly_days' in col_map else None,
-                    'amount_per_yearly_pt_days': self._parse_number(row[col_map['yearly_amount']]) if 'yearly_amount' in col_map else None,
-                    'inflation_rate': self._parse_number(row[col_map['inflation_rate']]) if 'inflation_rate' in col_map else None,
-                    'inflation_amount': self._parse_number(row[col_map['inflation_amount']]) if 'inflation_amount' in col_map else None,
-                    'total_amount': self._parse_number(row[col_map['total']]) if 'total' in col_map else None
-                }
-
-                # Skip subtotal and total rows (use word boundaries)
-                desc_lower = item['description'].lower()
-                # Check for whole words only, not substrings
-                import re
-                skip_pattern = r'\b(total|subtotal|sum)\b'
-                if item['description'] and not re.search(skip_pattern, desc_lower):
-                    variable_items.append(item)
-            except (ValueError, IndexError, KeyError):
-                continue
-
-        return variable_items
+        # Last resort for columns still unmapped: fuzzy header similarity
+        self._fuzzy_match_columns(match_headers, col_map, VARIABLE_CANONICAL_HEADERS)
+
+        # Parse data rows, one column at a time
+        return self._parse_rows(table, col_map, [
+            ('5_month_consumption', '5_month_cons'),
+            ('5_month_patient_days', '5_month_days'),
+            ('consumption_per_patient_day', 'cons_per_day'),
+            ('estimated_2025_yearly_pt_days', 'yearly_days'),
+            ('amount_per_yearly_pt_days', 'yearly_amount'),
+            ('inflation_rate', 'inflation_rate'),
+            ('inflation_amount', 'inflation_amount'),
+            ('total_amount', 'total'),
+        ])
     
     def _parse_total_table(self, table: List[List[str]]) -> Dict[str, Any]:
         """Parse total expenses table with flexible column detection"""
@@ -381,10 +698,12 @@ class DocumentParser:
             # Split and rejoin to normalize whitespace
             h = ' '.join(h.split())
             headers.append(h)
+        # Keyword rules look at the header text before any formula/unit note
+        match_headers = [self._strip_header_note(h) for h in headers]
 
         # Find column indices by matching keywords
         col_map = {}
-        for i, h in enumerate(headers):
+        for i, h in enumerate(match_headers):
             if '5-month' in h or ('5' in h and 'month' in h and i < 3):
                 # "5-month" column (usually first data column)
                 col_map['5_month'] = i
@@ -399,33 +718,73 @@ class DocumentParser:
                 # "Total amount" or "Total 2025" (usually last column)
                 col_map['total'] = i
 
-        # Parse the data row (usually just one row)
-        for row in table[1:]:
-            if not row or len(row) < 3:
-                continue
-
-            try:
-                return {
-                    '5_month_consumption': self._parse_number(row[col_map['5_month']]) if '5_month' in col_map else None,
-                    'yearly_consumption': self._parse_number(row[col_map['yearly']]) if 'yearly' in col_map else None,
-                    'inflation_rate': self._parse_number(row[col_map['inflation_rate']]) if 'inflation_rate' in col_map else None,
-                    'inflation_amount': self._parse_number(row[col_map['inflation_amount']]) if 'inflation_amount' in col_map else None,
-                    'total_amount': self._parse_number(row[col_map['total']]) if 'total' in col_map else None
-                }
-            except (ValueError, IndexError, KeyError):
-                continue
-
-        return {}
+        # Last resort for columns still unmapped: fuzzy header similarity
+        self._fuzzy_match_columns(match_headers, col_map, TOTAL_CANONICAL_HEADERS)
+
+        # Parse the data row (usually just one row); the first complete row wins
+        rows = self._parse_rows(table, col_map, [
+            ('5_month_consumption', '5_month'),
+            ('yearly_consumption', 'yearly'),
+            ('inflation_rate', 'inflation_rate'),
+            ('inflation_amount', 'inflation_amount'),
+            ('total_amount', 'total'),
+        ], with_description=False)
+        return rows[0] if rows else {}
     
-    def _extract_patient_days(self, table: List[List[str]]) -> int:
-        """Extract patient days from initial table"""
+    def _parse_rows(
+        self,
+        table: List[List[str]],
+        col_map: Dict[str, int],
+        fields: List[tuple],
+        with_description: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Parse data rows into items, one mapped column at a time
+        
+        fields lists (item key, col_map key) pairs in output order. Rows too short for the
+        mapped columns are skipped; so are total/subtotal rows when descriptions are parsed.
+        """
+        description_index = col_map.get('description', 0)
+        used_indices = [col_map[key] for _, key in fields if key in col_map]
+        if with_description:
+            used_indices.append(description_index)
+        width = max(used_indices, default=0) + 1
+        rows = [row for row in table[1:] if row and len(row) >= 3 and len(row) >= width]
+        
+        descriptions = []
+        if with_description:
+            # Skip subtotal and total rows (whole words only) before parsing their numbers
+            described = [(self._clean_text(row[description_index]), row) for row in rows]
+            described = [
+                (description, row) for description, row in described
+                if description and not SKIP_ROW_PATTERN.search(description.lower())
+            ]
+            descriptions = [description for description, _ in described]
+            rows = [row for _, row in described]
+        
+        columns = []
+        for _, key in fields:
+            if key in col_map:
+                index = col_map[key]
+                columns.append([self._parse_number(row[index]) for row in rows])
+            else:
+                columns.append([None] * len(rows))
+        
+        keys = [item_key for item_key, _ in fields]
+        if not with_description:
+            return [dict(zip(keys, values)) for values in zip(*columns)]
+        return [dict(zip(['description'] + keys, values)) for values in zip(descriptions, *columns)]
+    
+    def _extract_patient_days(self, table: List[List[str]]) -> Tuple[bool, Optional[float]]:
+        """(whether any cell mentions patient days, the value next to the first such cell that has one)"""
+        found = False
         for row in table:
             for i, cell in enumerate(row):
                 if 'patient days' in str(cell).lower():
                     # Next cell should have the value
                     if i + 1 < len(row):
-                        return self._parse_number(row[i + 1])
-        return None
+                        return True, self._parse_number(row[i + 1])
+                    found = True
+        return found, None
     
     def _match_columns_from_mappings(self, headers: List[str], table_type: str) -> Dict[str, int]:
         """Look up column mappings from pre-computed dictionary"""
@@ -438,6 +797,47 @@ class DocumentParser:
         else:
             return {}
 
+    def _strip_header_note(self, header: str) -> str:
+        """Drop a trailing formula/unit note but keep its unit marker, e.g. 'inflation (%)' -> 'inflation %'"""
+        match = HEADER_NOTE_PATTERN.search(header)
+        if not match or not match.start():
+            return header
+        note = match.group()
+        if HEADER_FORMULA_NOTE_PATTERN.search(note):
+            return header[:match.start()]
+        markers = [marker for marker in HEADER_UNIT_MARKERS if marker in note]
+        return ' '.join([header[:match.start()]] + markers)
+
+    def _fuzzy_match_columns(self, headers: List[str], col_map: Dict[str, int], canonical_headers: Dict[str, str]) -> None:
+        """Map keys missing from col_map to unclaimed columns whose header is similar enough"""
+        if process is None:
+            return
+
+        missing = [key for key in canonical_headers if key not in col_map]
+        # Column 0 holds the row labels
+        free = [i for i in range(1, len(headers)) if i not in col_map.values()]
+        if not missing or not free:
+            return
+
+        # Score every free header against every missing key in one call
+        scores = process.cdist(
+            [headers[i] for i in free],
+            [canonical_headers[key] for key in missing],
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=FUZZY_HEADER_MIN_SCORE
+        )
+        # Best pairs first (on equal scores, a column whose unit marker fits the key);
+        # each key and each column is used at most once
+        candidates = sorted(
+            (-scores[row][col], FUZZY_UNIT_MARKERS.get(missing[col], '') not in headers[free[row]], free[row], missing[col])
+            for row in range(len(free))
+            for col in range(len(missing))
+            if scores[row][col] > 0
+        )
+        for _, _, index, key in candidates:
+            if key not in col_map and index not in col_map.values():
+                col_map[key] = index
+
     def _clean_text(self, text: str) -> str:
         """Clean text from table cells"""
         if not text:
@@ -445,19 +845,23 @@ class DocumentParser:
         # Remove extra whitespace, newlines
         cleaned = ' '.join(str(text).split())
         # Remove special characters but keep alphanumeric and basic punctuation
-        cleaned = re.sub(r'[^\w\s\-/(),.]', '', cleaned)
+        cleaned = CLEAN_TEXT_PATTERN.sub('', cleaned)
         return cleaned.strip()
     
     def _parse_number(self, value: Any) -> float:
         """Parse numeric value from string, including formulas, text like '3,650 (10 pts × 365 days)' or '1,000 patient days'"""
-        if value is None or value == '' or str(value).lower() == 'none':
+        if value is None:
             return None
 
+        # Excel readers already hand back typed cells, no string work needed
+        if type(value) in (int, float):
+            return float(value)
+
         # Convert to string and clean
         value_str = str(value).strip()
 
         # Check if empty after stripping
-        if not value_str or value_str == '':
+        if not value_str or value_str.lower() == 'none':
             return None
 
         # Check if it contains a formula (e.g., "500/5= 100$" or "100 x 12= 1,200$")
@@ -477,13 +881,13 @@ class DocumentParser:
         # Try to extract the first number from the string using regex
         # This handles cases like "1,000 patient days" or "patient days: 1,000"
         # Pattern matches: numbers with commas OR plain numbers
-        number_pattern = r'-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
-        match = re.search(number_pattern, value_str)
+        match = NUMBER_PATTERN.search(value_str)
         if match:
-            value_str = match.group(0)
-
-        # Remove currency symbols, commas, percentage signs, spaces
-        value_str = re.sub(r'[$,\s%]', '', value_str)
+            # Digits, sign and separators only; just drop the thousands commas
+            value_str = match.group(0).replace(',', '')
+        else:
+            # Remove currency symbols, commas, percentage signs, spaces
+            value_str = value_str.translate(CURRENCY_STRIP_TABLE)
 
         # Check again after cleaning
         if not value_str or value_str == '':
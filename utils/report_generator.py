@@ -6,7 +6,133 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from io import BytesIO
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import multiprocessing
+import os
+
+# Batches smaller than this render in-process: starting a worker and importing
+# reportlab costs as much as ~20 reports
+PARALLEL_REPORT_MIN_COUNT = 32
+
+# Styles don't depend on the report, so they are built once at import
+# (reportlab doesn't mutate styles while building a document)
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1a1a1a'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#2c3e50'),
+    spaceAfter=12,
+    spaceBefore=20,
+    fontName='Helvetica-Bold'
+)
+
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubHeading',
+    parent=STYLES['Heading3'],
+    fontSize=12,
+    textColor=colors.HexColor('#34495e'),
+    spaceAfter=6,
+    fontName='Helvetica-Bold'
+)
+
+NORMAL_STYLE = STYLES['Normal']
+
+SCORE_LABEL_STYLE = ParagraphStyle('center', alignment=TA_CENTER, fontSize=14)
+SCORE_PASS_STYLE = ParagraphStyle('center', alignment=TA_CENTER, fontSize=20, textColor=colors.HexColor('#27ae60'))
+SCORE_FAIL_STYLE = ParagraphStyle('center', alignment=TA_CENTER, fontSize=20, textColor=colors.HexColor('#e74c3c'))
+
+FOOTER_STYLE = ParagraphStyle('footer', fontSize=8, textColor=colors.grey, alignment=TA_CENTER)
+
+VALIDATION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('TOPPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+])
+VALIDATION_COL_WIDTHS = [2.2*inch, 1.8*inch, 1.3*inch, 1.3*inch]
+VALIDATION_HEADER = ["Field", "Status", "Expected", "Actual"]
+ITEM_ROW_BACKGROUND = colors.HexColor('#ecf0f1')
+
+
+@functools.lru_cache(maxsize=128)
+def _field_display(field_name: str) -> str:
+    """Readable label for a validation field (the same few names repeat on every row)"""
+    return field_name.replace('_', ' ').title()
+
+
+def _format_value(value: Any, always_currency: bool = False) -> str:
+    """Format expected/actual numbers (totals are always money, item fields only above $100)"""
+    if value is None:
+        return 'N/A'
+    if not isinstance(value, (int, float)):
+        return str(value)
+    # Validation values arrive unrounded; decide on the cents value that is shown
+    if always_currency or round(value, 2) > 100:
+        return '$' + format(value, ',.2f')
+    return format(value, '.2f')
+
+
+def _validation_rows(validations: Dict[str, Any], always_currency: bool = False) -> List[List[str]]:
+    """Field/Status/Expected/Actual rows for one set of validations"""
+    return [
+        [
+            _field_display(field_name),
+            validation.get('status', ''),
+            _format_value(validation.get('expected', 'N/A'), always_currency),
+            _format_value(validation.get('actual', 'N/A'), always_currency)
+        ]
+        for field_name, validation in validations.items()
+    ]
+
+
+def _build_validation_table(validations: Dict[str, Any], always_currency: bool = False) -> Table:
+    """Field/Status/Expected/Actual table for one set of validations"""
+    validation_data = [VALIDATION_HEADER] + _validation_rows(validations, always_currency)
+    
+    # Table.setStyle only reads the shared style's commands
+    validation_table = Table(validation_data, colWidths=VALIDATION_COL_WIDTHS)
+    validation_table.setStyle(VALIDATION_TABLE_STYLE)
+    return validation_table
+
+
+def _build_section_table(item_results: List[Dict[str, Any]]) -> Table:
+    """One table for a fixed/variable section: an item-name row spanning the table, then its validations"""
+    section_data = [VALIDATION_HEADER]
+    item_commands = []
+    
+    for item_result in item_results:
+        row = len(section_data)
+        section_data.append([Paragraph(f"<b>{item_result['description']}</b>", SUBHEADING_STYLE), '', '', ''])
+        item_commands.append(('SPAN', (0, row), (-1, row)))
+        item_commands.append(('BACKGROUND', (0, row), (-1, row), ITEM_ROW_BACKGROUND))
+        section_data.extend(_validation_rows(item_result.get('validations', {})))
+    
+    # A single table lays out and splits across pages in one pass instead of one per item
+    section_table = Table(section_data, colWidths=VALIDATION_COL_WIDTHS, repeatRows=1)
+    section_table.setStyle(TableStyle(item_commands, parent=VALIDATION_TABLE_STYLE))
+    return section_table
+
 
 def generate_pdf_report(report_data: Dict[str, Any]) -> BytesIO:
     """Generate PDF grading report"""
@@ -17,41 +143,8 @@ def generate_pdf_report(report_data: Dict[str, Any]) -> BytesIO:
     # Container for the 'Flowable' objects
     elements = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        textColor=colors.HexColor('#34495e'),
-        spaceAfter=6,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = styles['Normal']
-    
     # Title
-    elements.append(Paragraph("SUPPLIES BUDGET GRADING REPORT", title_style))
+    elements.append(Paragraph("SUPPLIES BUDGET GRADING REPORT", TITLE_STYLE))
     elements.append(Spacer(1, 0.2*inch))
     
     # Header information
@@ -79,11 +172,12 @@ def generate_pdf_report(report_data: Dict[str, Any]) -> BytesIO:
     score = report_data.get('correct_count', 0)
     total = report_data.get('total_calculations', 1)
     percentage = report_data.get('percentage', 0)
+    score_style = SCORE_PASS_STYLE if percentage >= 70 else SCORE_FAIL_STYLE
     
     score_data = [[
-        Paragraph(f"<b>SCORE</b>", ParagraphStyle('center', alignment=TA_CENTER, fontSize=14)),
-        Paragraph(f"<b>{score}/{total}</b>", ParagraphStyle('center', alignment=TA_CENTER, fontSize=20, textColor=colors.HexColor('#27ae60') if percentage >= 70 else colors.HexColor('#e74c3c'))),
-        Paragraph(f"<b>{percentage:.1f}%</b>", ParagraphStyle('center', alignment=TA_CENTER, fontSize=20, textColor=colors.HexColor('#27ae60') if percentage >= 70 else colors.HexColor('#e74c3c')))
+        Paragraph(f"<b>SCORE</b>", SCORE_LABEL_STYLE),
+        Paragraph(f"<b>{score}/{total}</b>", score_style),
+        Paragraph(f"<b>{percentage:.1f}%</b>", score_style)
     ]]
     
     score_table = Table(score_data, colWidths=[2*inch, 2*inch, 2*inch])
@@ -99,161 +193,58 @@ def generate_pdf_report(report_data: Dict[str, Any]) -> BytesIO:
     elements.append(Spacer(1, 0.4*inch))
     
     # Fixed Expenses Results
-    elements.append(Paragraph("FIXED EXPENSES", heading_style))
+    elements.append(Paragraph("FIXED EXPENSES", HEADING_STYLE))
     
-    for item_result in report_data.get('fixed_expenses_results', []):
-        elements.append(Paragraph(f"<b>{item_result['description']}</b>", subheading_style))
-        
-        validations = item_result.get('validations', {})
-        if validations:
-            validation_data = [["Field", "Status", "Expected", "Actual"]]
-            
-            for field_name, validation in validations.items():
-                status = validation.get('status', '')
-                expected = validation.get('expected', 'N/A')
-                actual = validation.get('actual', 'N/A')
-                
-                # Format numbers
-                if isinstance(expected, (int, float)):
-                    expected = f"${expected:,.2f}" if expected > 100 else f"{expected:.2f}"
-                if isinstance(actual, (int, float)):
-                    actual = f"${actual:,.2f}" if actual > 100 else f"{actual:.2f}"
-                
-                # Clean field name
-                field_display = field_name.replace('_', ' ').title()
-                
-                validation_data.append([
-                    field_display,
-                    status,
-                    str(expected),
-                    str(actual)
-                ])
-            
-            validation_table = Table(validation_data, colWidths=[2.2*inch, 1.8*inch, 1.3*inch, 1.3*inch])
-            validation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-            ]))
-            elements.append(validation_table)
-        
-        elements.append(Spacer(1, 0.15*inch))
+    fixed_results = report_data.get('fixed_expenses_results', [])
+    if fixed_results:
+        elements.append(_build_section_table(fixed_results))
     
     # Variable Expenses Results
     elements.append(Spacer(1, 0.2*inch))
-    elements.append(Paragraph("VARIABLE EXPENSES", heading_style))
+    elements.append(Paragraph("VARIABLE EXPENSES", HEADING_STYLE))
     
-    for item_result in report_data.get('variable_expenses_results', []):
-        elements.append(Paragraph(f"<b>{item_result['description']}</b>", subheading_style))
-        
-        validations = item_result.get('validations', {})
-        if validations:
-            validation_data = [["Field", "Status", "Expected", "Actual"]]
-            
-            for field_name, validation in validations.items():
-                status = validation.get('status', '')
-                expected = validation.get('expected', 'N/A')
-                actual = validation.get('actual', 'N/A')
-                
-                if isinstance(expected, (int, float)):
-                    expected = f"${expected:,.2f}" if expected > 100 else f"{expected:.2f}"
-                if isinstance(actual, (int, float)):
-                    actual = f"${actual:,.2f}" if actual > 100 else f"{actual:.2f}"
-                
-                field_display = field_name.replace('_', ' ').title()
-                
-                validation_data.append([
-                    field_display,
-                    status,
-                    str(expected),
-                    str(actual)
-                ])
-            
-            validation_table = Table(validation_data, colWidths=[2.2*inch, 1.8*inch, 1.3*inch, 1.3*inch])
-            validation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-            ]))
-            elements.append(validation_table)
-        
-        elements.append(Spacer(1, 0.15*inch))
+    variable_results = report_data.get('variable_expenses_results', [])
+    if variable_results:
+        elements.append(_build_section_table(variable_results))
     
     # Total Expenses Results
     elements.append(Spacer(1, 0.2*inch))
-    elements.append(Paragraph("TOTAL EXPENSES", heading_style))
+    elements.append(Paragraph("TOTAL EXPENSES", HEADING_STYLE))
     
     total_validations = report_data.get('total_expenses_results', {})
     if total_validations:
-        validation_data = [["Field", "Status", "Expected", "Actual"]]
-        
-        for field_name, validation in total_validations.items():
-            status = validation.get('status', '')
-            expected = validation.get('expected', 'N/A')
-            actual = validation.get('actual', 'N/A')
-            
-            if isinstance(expected, (int, float)):
-                expected = f"${expected:,.2f}"
-            if isinstance(actual, (int, float)):
-                actual = f"${actual:,.2f}"
-            
-            field_display = field_name.replace('_', ' ').title()
-            
-            validation_data.append([
-                field_display,
-                status,
-                str(expected),
-                str(actual)
-            ])
-        
-        validation_table = Table(validation_data, colWidths=[2.2*inch, 1.8*inch, 1.3*inch, 1.3*inch])
-        validation_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ]))
-        elements.append(validation_table)
+        elements.append(_build_validation_table(total_validations, always_currency=True))
     
     # Summary
     if report_data.get('summary'):
         elements.append(Spacer(1, 0.3*inch))
-        elements.append(Paragraph("SUMMARY", heading_style))
-        elements.append(Paragraph(report_data['summary'], normal_style))
+        elements.append(Paragraph("SUMMARY", HEADING_STYLE))
+        elements.append(Paragraph(report_data['summary'], NORMAL_STYLE))
     
     # Footer
     elements.append(Spacer(1, 0.5*inch))
-    footer_style = ParagraphStyle('footer', fontSize=8, textColor=colors.grey, alignment=TA_CENTER)
-    elements.append(Paragraph(f"Generated by LAU Nursing Budget Grader | {datetime.now().strftime('%Y-%m-%d %H:%M')}", footer_style))
+    elements.append(Paragraph(f"Generated by LAU Nursing Budget Grader | {datetime.now().strftime('%Y-%m-%d %H:%M')}", FOOTER_STYLE))
     
     # Build PDF
     doc.build(elements)
     
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def _report_bytes(report_data: Dict[str, Any]) -> bytes:
+    """PDF bytes for one report (picklable result for worker processes)"""
+    return generate_pdf_report(report_data).getvalue()
+
+
+def generate_pdf_reports(reports: List[Dict[str, Any]]) -> List[bytes]:
+    """PDF bytes for many grading reports (batch/CLI grading), one process per CPU for large batches"""
+    workers = min(os.cpu_count() or 1, len(reports))
+    if len(reports) < PARALLEL_REPORT_MIN_COUNT or workers < 2:
+        return [_report_bytes(report) for report in reports]
+    
+    # "spawn" avoids forking a multi-threaded caller; reportlab is pure Python, so
+    # separate processes are what gets the reports off a single GIL
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        chunksize = -(-len(reports) // workers)
+        return list(pool.map(_report_bytes, reports, chunksize=chunksize))
@@ -0,0 +1,135 @@
+"""
+Response schemas for AI extraction and validation
+Shaped for OpenAI strict structured outputs: every field is required (nullable
+where a value may be missing) and no extra keys are allowed
+"""
+from typing import Dict, List, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class StrictModel(BaseModel):
+    model_config = ConfigDict(extra='forbid', populate_by_name=True)
+
+    @classmethod
+    def json_schema(cls) -> Dict[str, Any]:
+        """JSON schema using the aliased (wire) field names"""
+        return cls.model_json_schema(by_alias=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with the wire field names"""
+        return self.model_dump(by_alias=True)
+
+
+# ==================== EXTRACTION ====================
+
+class FixedExpense(StrictModel):
+    description: str
+    five_month_consumption: Optional[float] = Field(alias='5_month_consumption')
+    monthly_consumption: Optional[float]
+    year_2024_consumption: Optional[float] = Field(alias='2024_year_consumption')
+    inflation_rate: Optional[float]
+    inflation_amount: Optional[float]
+    estimated_2025_consumption: Optional[float]
+
+
+class VariableExpense(StrictModel):
+    description: str
+    five_month_consumption: Optional[float] = Field(alias='5_month_consumption')
+    five_month_patient_days: Optional[float] = Field(alias='5_month_patient_days')
+    consumption_per_patient_day: Optional[float]
+    estimated_2025_yearly_pt_days: Optional[float]
+    amount_per_yearly_pt_days: Optional[float]
+    inflation_rate: Optional[float]
+    inflation_amount: Optional[float]
+    total_amount: Optional[float]
+
+
+class TotalExpenses(StrictModel):
+    five_month_consumption: Optional[float] = Field(alias='5_month_consumption')
+    yearly_consumption: Optional[float]
+    inflation_rate: Optional[float]
+    inflation_amount: Optional[float]
+    total_amount: Optional[float]
+
+
+class ExtractedBudget(StrictModel):
+    student_name: str
+    department: str
+    fixed_expenses: List[FixedExpense]
+    variable_expenses: List[VariableExpense]
+    total_expenses: TotalExpenses
+    patient_days_initial: Optional[float]
+
+
+# ==================== VALIDATION ====================
+
+class ValidationResult(StrictModel):
+    correct: bool
+    status: str
+    expected: Optional[float]
+    actual: Optional[float]
+
+
+class ItemValidations(StrictModel):
+    """Every checkable fixed/variable field; fields that weren't checked are null"""
+    monthly_consumption: Optional[ValidationResult]
+    year_2024_consumption: Optional[ValidationResult] = Field(alias='2024_year_consumption')
+    estimated_2025_consumption: Optional[ValidationResult]
+    estimated_2025_yearly_pt_days: Optional[ValidationResult]
+    consumption_per_patient_day: Optional[ValidationResult]
+    amount_per_yearly_pt_days: Optional[ValidationResult]
+    inflation_amount: Optional[ValidationResult]
+    total_amount: Optional[ValidationResult]
+
+
+class ItemResult(StrictModel):
+    description: str
+    validations: ItemValidations
+
+
+class TotalValidations(StrictModel):
+    five_month_consumption: Optional[ValidationResult] = Field(alias='5_month_consumption')
+    yearly_consumption: Optional[ValidationResult]
+    inflation_amount: Optional[ValidationResult]
+    total_amount: Optional[ValidationResult]
+
+
+class GradingReport(StrictModel):
+    student_name: str
+    department: str
+    fixed_expenses_results: List[ItemResult]
+    variable_expenses_results: List[ItemResult]
+    total_expenses_results: TotalValidations
+    correct_count: int
+    total_calculations: int
+    percentage: float
+    summary: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report dict in BudgetValidator's shape (unchecked fields left out)"""
+        report = super().to_dict()
+        for item in report['fixed_expenses_results'] + report['variable_expenses_results']:
+            item['validations'] = {k: v for k, v in item['validations'].items() if v is not None}
+        report['total_expenses_results'] = {
+            k: v for k, v in report['total_expenses_results'].items() if v is not None
+        }
+        return report
+
+
+class StudentReport(StrictModel):
+    student_id: str
+    report: GradingReport
+
+
+class GradingReportBatch(StrictModel):
+    """Reports for several students graded in one request"""
+    results: List[StudentReport]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Batch dict with every report in BudgetValidator's shape"""
+        return {
+            'results': [
+                {'student_id': result.student_id, 'report': result.report.to_dict()}
+                for result in self.results
+            ]
+        }
@@ -1,4 +1,60 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+import math
+import numpy as np
+from utils._validate_kernel import FIXED_CHECKS, VARIABLE_CHECKS, fixed_checks, variable_checks
+
+FIXED_FIELDS = [
+    '5_month_consumption', 'monthly_consumption', '2024_year_consumption',
+    'inflation_rate', 'inflation_amount', 'estimated_2025_consumption'
+]
+VARIABLE_FIELDS = [
+    '5_month_consumption', '5_month_patient_days', 'consumption_per_patient_day',
+    'estimated_2025_yearly_pt_days', 'amount_per_yearly_pt_days',
+    'inflation_rate', 'inflation_amount', 'total_amount'
+]
+
+# Result statuses shown in the UI and PDF report
+STATUS_CORRECT = '✅ Correct'
+STATUS_INCORRECT = '❌ Incorrect (off by %.2f)'
+STATUS_MISSING = '⚠️ Missing value'
+
+
+def display_value(value: Any) -> Any:
+    """Expected/actual value as shown to users: numbers rounded to cents"""
+    if isinstance(value, (int, float)):
+        return round(value, 2)
+    return value
+
+
+def _rounded_validations(validations: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a field -> result mapping with display values"""
+    return {
+        field: {**result, 'expected': display_value(result.get('expected')), 'actual': display_value(result.get('actual'))}
+        for field, result in validations.items()
+    }
+
+
+def rounded_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a grading report with every expected/actual value rounded to cents (for export)"""
+    rounded = dict(report)
+    for section in ('fixed_expenses_results', 'variable_expenses_results'):
+        rounded[section] = [
+            {**item, 'validations': _rounded_validations(item.get('validations', {}))}
+            for item in report.get(section, [])
+        ]
+    rounded['total_expenses_results'] = _rounded_validations(report.get('total_expenses_results', {}))
+    return rounded
+
+
+def _as_float(value: Any) -> float:
+    """Float value of a cell, NaN when it is missing or not numeric"""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
 
 class BudgetValidator:
     """Validate budget calculations against formulas"""
@@ -6,171 +62,164 @@ class BudgetValidator:
     def __init__(self, inflation_rate: float = 5.0, tolerance: float = 0.5):
         self.inflation_rate = inflation_rate
         self.tolerance = tolerance
+        # rate / 100, shared by every item that doesn't state its own rate
+        self._inflation_multiplier = inflation_rate / 100
     
     def validate(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate all budget calculations"""
+        return self.validate_many([extracted_data])[0]
+    
+    def validate_many(self, budgets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate several budgets, checking every student's items in one pass per table (reports in input order)"""
         
-        report = {
-            'student_name': extracted_data.get('student_name', 'Unknown'),
-            'department': extracted_data.get('department', 'Unknown'),
-            'fixed_expenses_results': [],
-            'variable_expenses_results': [],
-            'total_expenses_results': {},
-            'correct_count': 0,
-            'total_calculations': 0,
-            'percentage': 0.0
-        }
-        
-        # Validate fixed expenses
-        for item in extracted_data.get('fixed_expenses', []):
-            item_result = self._validate_fixed_item(item)
-            report['fixed_expenses_results'].append(item_result)
-            
-            # Count correct/total
-            for validation in item_result['validations'].values():
-                report['total_calculations'] += 1
-                if validation['correct']:
-                    report['correct_count'] += 1
-        
-        # Validate variable expenses
-        for item in extracted_data.get('variable_expenses', []):
-            item_result = self._validate_variable_item(item)
-            report['variable_expenses_results'].append(item_result)
-            
-            for validation in item_result['validations'].values():
-                report['total_calculations'] += 1
-                if validation['correct']:
-                    report['correct_count'] += 1
+        # Every student's items laid end to end, as columns shared by the item and total checks
+        fixed_lists = [data.get('fixed_expenses', []) for data in budgets]
+        variable_lists = [data.get('variable_expenses', []) for data in budgets]
+        fixed_items = [item for items in fixed_lists for item in items]
+        variable_items = [item for items in variable_lists for item in items]
+        fixed_columns = self._to_columns(fixed_items, FIXED_FIELDS)
+        variable_columns = self._to_columns(variable_items, VARIABLE_FIELDS)
         
-        # Validate total expenses
-        total_result = self._validate_total(
-            extracted_data.get('total_expenses', {}),
-            extracted_data.get('fixed_expenses', []),
-            extracted_data.get('variable_expenses', [])
+        # Validate fixed and variable expenses (all items at once)
+        fixed_results, fixed_correct, fixed_checked = self._validate_fixed_items(fixed_items, fixed_columns)
+        variable_results, variable_correct, variable_checked = self._validate_variable_items(
+            variable_items, variable_columns
         )
-        report['total_expenses_results'] = total_result
-        
-        for validation in total_result.values():
-            report['total_calculations'] += 1
-            if validation['correct']:
-                report['correct_count'] += 1
         
-        # Calculate percentage
-        if report['total_calculations'] > 0:
-            report['percentage'] = (report['correct_count'] / report['total_calculations']) * 100
+        reports = []
+        fixed_start = variable_start = 0
+        for data, fixed, variable in zip(budgets, fixed_lists, variable_lists):
+            fixed_stop = fixed_start + len(fixed)
+            variable_stop = variable_start + len(variable)
+            
+            # Validate total expenses
+            total_result = self._validate_total(
+                data.get('total_expenses', {}),
+                {field: values[fixed_start:fixed_stop] for field, values in fixed_columns.items()},
+                {field: values[variable_start:variable_stop] for field, values in variable_columns.items()}
+            )
+            
+            # Count correct/total (item counts come from the check masks)
+            correct_count = (
+                sum(fixed_correct[fixed_start:fixed_stop]) + sum(variable_correct[variable_start:variable_stop])
+                + sum(1 for validation in total_result.values() if validation['correct'])
+            )
+            total_calculations = (
+                sum(fixed_checked[fixed_start:fixed_stop]) + sum(variable_checked[variable_start:variable_stop])
+                + len(total_result)
+            )
+            
+            # Each report is built once with its final values
+            report = {
+                'student_name': data.get('student_name', 'Unknown'),
+                'department': data.get('department', 'Unknown'),
+                'fixed_expenses_results': fixed_results[fixed_start:fixed_stop],
+                'variable_expenses_results': variable_results[variable_start:variable_stop],
+                'total_expenses_results': total_result,
+                'correct_count': correct_count,
+                'total_calculations': total_calculations,
+                # Calculate percentage
+                'percentage': (correct_count / total_calculations) * 100 if total_calculations > 0 else 0.0
+            }
+            
+            reports.append(report)
+            fixed_start, variable_start = fixed_stop, variable_stop
         
-        return report
+        return reports
     
-    def _validate_fixed_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate fixed expense item calculations"""
-
-        validations = {}
+    def _validate_fixed_items(
+        self, items: List[Dict[str, Any]], columns: Dict[str, np.ndarray]
+    ) -> Tuple[List[Dict[str, Any]], List[int], List[int]]:
+        """Validate fixed expense calculations for every item in one pass; returns (results, correct per item, checked per item)"""
 
         # Get student values
-        five_month = item.get('5_month_consumption')
-        monthly = item.get('monthly_consumption')
-        year_2024 = item.get('2024_year_consumption')
-        inflation_rate = item.get('inflation_rate')
-        if inflation_rate is None:
-            inflation_rate = self.inflation_rate
-        inflation_amount = item.get('inflation_amount')
-        estimated_2025 = item.get('estimated_2025_consumption')
+        five_month = columns['5_month_consumption']
+        monthly = columns['monthly_consumption']
+        year_2024 = columns['2024_year_consumption']
+        inflation_multiplier = self._inflation_multipliers(columns['inflation_rate'])
+        inflation_amount = columns['inflation_amount']
+        estimated_2025 = columns['estimated_2025_consumption']
 
-        # Validate Monthly Consumption = 5-month / 5
-        if five_month is not None and monthly is not None:
-            expected_monthly = five_month / 5
-            validations['monthly_consumption'] = self._compare_values(
-                monthly, expected_monthly, "Monthly consumption"
-            )
-
-        # Validate 2024 Year = Monthly × 12
-        if monthly is not None and year_2024 is not None:
-            expected_year = monthly * 12
-            validations['2024_year_consumption'] = self._compare_values(
-                year_2024, expected_year, "2024 year consumption"
-            )
-
-        # Validate Inflation Amount = 2024 Year × (rate / 100)
-        if year_2024 is not None and inflation_amount is not None and inflation_rate is not None:
-            expected_inflation = year_2024 * (inflation_rate / 100)
-            validations['inflation_amount'] = self._compare_values(
-                inflation_amount, expected_inflation, "Inflation amount"
-            )
-
-        # Validate 2025 Estimate = 2024 Year + Inflation
-        if year_2024 is not None and inflation_amount is not None and estimated_2025 is not None:
-            expected_2025 = year_2024 + inflation_amount
-            validations['estimated_2025_consumption'] = self._compare_values(
-                estimated_2025, expected_2025, "Estimated 2025 consumption"
-            )
+        # Formulas live in the kernel, one row per FIXED_CHECKS field
+        checked = fixed_checks(
+            five_month, monthly, year_2024, inflation_multiplier,
+            inflation_amount, estimated_2025, float(self.tolerance)
+        )
+        actuals = [monthly, year_2024, inflation_amount, estimated_2025]
 
-        return {
-            'description': item.get('description', 'Unknown'),
-            'validations': validations
-        }
+        return self._item_results(items, FIXED_CHECKS, actuals, checked)
     
-    def _validate_variable_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate variable expense item calculations"""
-
-        validations = {}
+    def _validate_variable_items(
+        self, items: List[Dict[str, Any]], columns: Dict[str, np.ndarray]
+    ) -> Tuple[List[Dict[str, Any]], List[int], List[int]]:
+        """Validate variable expense calculations for every item in one pass; returns (results, correct per item, checked per item)"""
 
         # Get student values
-        five_month = item.get('5_month_consumption')
-        five_month_days = item.get('5_month_patient_days')
-        per_day = item.get('consumption_per_patient_day')
-        yearly_days = item.get('estimated_2025_yearly_pt_days')
-        amount_yearly = item.get('amount_per_yearly_pt_days')
-        inflation_rate = item.get('inflation_rate')
-        if inflation_rate is None:
-            inflation_rate = self.inflation_rate
-        inflation_amount = item.get('inflation_amount')
-        total = item.get('total_amount')
-
-        # NEW: Validate Estimated 2025 yearly pt days = (5-month pt days ÷ 5) × 12
-        if five_month_days is not None and yearly_days is not None:
-            expected_yearly_days = (five_month_days / 5) * 12
-            validations['estimated_2025_yearly_pt_days'] = self._compare_values(
-                yearly_days, expected_yearly_days, "Estimated 2025 yearly patient days"
-            )
+        five_month = columns['5_month_consumption']
+        five_month_days = columns['5_month_patient_days']
+        per_day = columns['consumption_per_patient_day']
+        yearly_days = columns['estimated_2025_yearly_pt_days']
+        amount_yearly = columns['amount_per_yearly_pt_days']
+        inflation_multiplier = self._inflation_multipliers(columns['inflation_rate'])
+        inflation_amount = columns['inflation_amount']
+        total = columns['total_amount']
 
-        # Validate Consumption per Patient Day = 5-month / 5-month days
-        if five_month is not None and five_month_days is not None and per_day is not None:
-            expected_per_day = five_month / five_month_days
-            validations['consumption_per_patient_day'] = self._compare_values(
-                per_day, expected_per_day, "Consumption per patient day"
-            )
-
-        # Validate Amount per Yearly Days = Per day × Yearly days
-        if per_day is not None and yearly_days is not None and amount_yearly is not None:
-            expected_yearly = per_day * yearly_days
-            validations['amount_per_yearly_pt_days'] = self._compare_values(
-                amount_yearly, expected_yearly, "Amount per yearly patient days"
-            )
+        # Formulas live in the kernel, one row per VARIABLE_CHECKS field
+        checked = variable_checks(
+            five_month, five_month_days, per_day, yearly_days, amount_yearly,
+            inflation_multiplier, inflation_amount, total, float(self.tolerance)
+        )
+        actuals = [yearly_days, per_day, amount_yearly, inflation_amount, total]
 
-        # Validate Inflation Amount = Amount yearly × (rate / 100)
-        if amount_yearly is not None and inflation_amount is not None and inflation_rate is not None:
-            expected_inflation = amount_yearly * (inflation_rate / 100)
-            validations['inflation_amount'] = self._compare_values(
-                inflation_amount, expected_inflation, "Inflation amount"
-            )
+        return self._item_results(items, VARIABLE_CHECKS, actuals, checked)
+    
+    def _to_columns(self, items: List[Dict[str, Any]], fields: List[str]) -> Dict[str, np.ndarray]:
+        """Lay out item values as float columns, with NaN for missing values"""
+        # One read per item field, converted in a single call (NumPy turns None into NaN);
+        # only tables with text NumPy can't parse go through _as_float cell by cell
+        rows = [[item.get(field) for field in fields] for item in items]
+        try:
+            matrix = np.array(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            matrix = np.array([[_as_float(value) for value in row] for row in rows], dtype=np.float64)
+        matrix = matrix.reshape(len(items), len(fields))
+        return {field: np.ascontiguousarray(matrix[:, j]) for j, field in enumerate(fields)}
+    
+    def _inflation_multipliers(self, rates: np.ndarray) -> np.ndarray:
+        """Per-item rate / 100, falling back to the configured rate where an item has none"""
+        return np.where(np.isnan(rates), self._inflation_multiplier, rates / 100)
+    
+    def _item_results(
+        self, items: List[Dict[str, Any]], fields: List[str], actuals: List[np.ndarray], checked: tuple
+    ) -> Tuple[List[Dict[str, Any]], List[int], List[int]]:
+        """Per-item results from the kernel's (expected, difference, present, correct) rows, with per-item correct and checked counts"""
+        expected, difference, present, correct = checked
+        correct_counts = np.count_nonzero(present & correct, axis=0).tolist()
+        checked_counts = np.count_nonzero(present, axis=0).tolist()
 
-        # Validate Total = Amount yearly + Inflation
-        if amount_yearly is not None and inflation_amount is not None and total is not None:
-            expected_total = amount_yearly + inflation_amount
-            validations['total_amount'] = self._compare_values(
-                total, expected_total, "Total amount"
-            )
+        # Plain Python lists once per table instead of NumPy scalar indexing per value
+        expected, difference, present, correct = (values.tolist() for values in checked)
+        actuals = [actual.tolist() for actual in actuals]
 
-        return {
-            'description': item.get('description', 'Unknown'),
-            'validations': validations
-        }
+        results = []
+        for i, item in enumerate(items):
+            validations = {}
+            for row, field in enumerate(fields):
+                if present[row][i]:
+                    validations[field] = self._result(
+                        correct[row][i], difference[row][i], expected[row][i], actuals[row][i]
+                    )
+            results.append({
+                'description': item.get('description', 'Unknown'),
+                'validations': validations
+            })
+        return results, correct_counts, checked_counts
     
     def _validate_total(
         self, 
         total_data: Dict[str, Any],
-        fixed_items: List[Dict[str, Any]],
-        variable_items: List[Dict[str, Any]]
+        fixed_columns: Dict[str, np.ndarray],
+        variable_columns: Dict[str, np.ndarray]
     ) -> Dict[str, Any]:
         """Validate total expenses calculations"""
         
@@ -180,24 +229,14 @@ class BudgetValidator:
         five_month = total_data.get('5_month_consumption')
         yearly = total_data.get('yearly_consumption')
         inflation_rate = total_data.get('inflation_rate')
-        if inflation_rate is None:
-            inflation_rate = self.inflation_rate
+        inflation_multiplier = self._inflation_multiplier if inflation_rate is None else inflation_rate / 100
         inflation_amount = total_data.get('inflation_amount')
         total = total_data.get('total_amount')
 
-        # Calculate expected 5-month total
-        expected_five_month = 0
-        fixed_five_month = 0
-        variable_five_month = 0
-
-        for item in fixed_items:
-            if item.get('5_month_consumption'):
-                fixed_five_month += item['5_month_consumption']
-                expected_five_month += item['5_month_consumption']
-        for item in variable_items:
-            if item.get('5_month_consumption'):
-                variable_five_month += item['5_month_consumption']
-                expected_five_month += item['5_month_consumption']
+        # Calculate expected 5-month total (missing values count as 0)
+        fixed_five_month = float(np.nansum(fixed_columns['5_month_consumption']))
+        variable_five_month = float(np.nansum(variable_columns['5_month_consumption']))
+        expected_five_month = fixed_five_month + variable_five_month
 
         if five_month is not None:
             validation_result = self._compare_values(
@@ -209,13 +248,10 @@ class BudgetValidator:
 
         # Calculate expected yearly total
         # Yearly = (Total fixed 2024-year) + (Total variable amount per yearly pt days)
-        expected_yearly = 0
-        for item in fixed_items:
-            if item.get('2024_year_consumption'):
-                expected_yearly += item['2024_year_consumption']
-        for item in variable_items:
-            if item.get('amount_per_yearly_pt_days'):
-                expected_yearly += item['amount_per_yearly_pt_days']
+        expected_yearly = float(
+            np.nansum(fixed_columns['2024_year_consumption']) +
+            np.nansum(variable_columns['amount_per_yearly_pt_days'])
+        )
 
         if yearly is not None:
             validations['yearly_consumption'] = self._compare_values(
@@ -223,8 +259,8 @@ class BudgetValidator:
             )
 
         # Validate Inflation Amount = Yearly × (rate / 100)
-        if yearly is not None and inflation_amount is not None and inflation_rate is not None:
-            expected_inflation = yearly * (inflation_rate / 100)
+        if yearly is not None and inflation_amount is not None:
+            expected_inflation = yearly * inflation_multiplier
             validations['inflation_amount'] = self._compare_values(
                 inflation_amount, expected_inflation, "Total inflation amount"
             )
@@ -244,17 +280,29 @@ class BudgetValidator:
         if actual is None:
             return {
                 'correct': False,
-                'status': f'⚠️ Missing value',
-                'expected': round(expected, 2),
+                'status': STATUS_MISSING,
+                'expected': expected,
                 'actual': None
             }
         
         difference = abs(actual - expected)
         is_correct = difference <= self.tolerance
         
+        return self._result(is_correct, difference, expected, actual)
+    
+    def _result(self, is_correct: bool, difference: float, expected: float, actual: float) -> Dict[str, Any]:
+        """Build the result entry for one checked value (values are rounded when shown, see rounded_report)"""
+        if not (math.isfinite(expected) and math.isfinite(actual)):
+            # x/0 (e.g. zero patient days) has no expected value; inf/NaN would also make the JSON export invalid
+            return {
+                'correct': False,
+                'status': STATUS_MISSING,
+                'expected': expected if math.isfinite(expected) else None,
+                'actual': actual if math.isfinite(actual) else None
+            }
         return {
             'correct': is_correct,
-            'status': '✅ Correct' if is_correct else f'❌ Incorrect (off by {difference:.2f})',
-            'expected': round(expected, 2),
-            'actual': round(actual, 2)
+            'status': STATUS_CORRECT if is_correct else STATUS_INCORRECT % difference,
+            'expected': expected,
+            'actual': actual
         }
\ No newline at end of file